@@ -1,58 +1,73 @@
 import os
 import sys
 import math
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
                 "/../../Search_based_Planning/")
 
 import plotting, env
+from priority_queue import PriorityQueue
+from schedules import FixedStep
+from history import FullHistory
+from jps import JumpPoints
 
 
 class AraStar:
-    def __init__(self, s_start, s_goal, e, heuristic_type):
+    def __init__(self, s_start, s_goal, e, heuristic_type, schedule=None, connected=8, size=50, coverage=0.1, rng=None, obs=None, history=None, jps=False):
         self.s_start, self.s_goal = s_start, s_goal
         self.heuristic_type = heuristic_type
+        self.schedule = schedule or FixedStep(0.4)                          # how e decreases between ImprovePath calls
+        self.last_round = (0.0, 0)                                          # time and expansions of the last ImprovePath
 
-        self.Env = env.Env(s_start, s_goal)                                                # class Env
+        self.Env = env.Env(s_start, s_goal, connected, size, coverage, rng=rng, obs=obs)   # class Env
 
         self.u_set = self.Env.motions                                       # feasible input set
         self.obs = self.Env.obs                                             # position of obstacles
+        self.cells = self.obs.cells                                         # occupancy grid, read directly
+        self.x, self.y = self.Env.x_range, self.Env.y_range
+        self.space = self.Env.space                                         # flat state ids
+        self.start, self.goal = self.space.index(s_start), self.space.index(s_goal)
         self.e = e                                                          # weight
 
-        self.g = dict()                                                     # Cost to come
-        self.OPEN = dict()                                                  # priority queue / OPEN set
+        self.g = self.space.values(math.inf)                                # Cost to come
+        self.H = self.space.values(-1.0)                                    # cached heuristic, -1 = not yet computed
+        self.OPEN = PriorityQueue()                                         # priority queue / OPEN set
         self.CLOSED = set()                                                 # CLOSED set
         self.INCONS = {}                                                    # INCONSISTENT set
-        self.PARENT = dict()                                                # relations
+        self.BOUND = PriorityQueue()                                        # g + h over OPEN U INCONS
+        self.PARENT = self.space.parents()                                  # relations
         self.path = []                                                      # planning path
-        self.visited = []                                                   # order of visited nodes
+        self.visited = history if history is not None else FullHistory()   # order of visited nodes, per iteration
+        self.jump = JumpPoints(self.space, self.cells, self.goal) if jps else None   # jump point successors, None = all neighbours
 
     def init(self):
         """
         initialize each set.
         """
 
-        self.g[self.s_start] = 0.0
-        self.g[self.s_goal] = math.inf
-        self.OPEN[self.s_start] = self.f_value(self.s_start)
-        self.PARENT[self.s_start] = self.s_start
+        self.g[self.start] = 0.0
+        self.OPEN[self.start] = self.f_value(self.start)
+        self.update_bound(self.start)
+        self.PARENT[self.start] = self.start
 
     def searching(self):
         self.init()
+        self.schedule.reset()
         self.ImprovePath()
         self.path.append(self.extract_path())
 
         while self.update_e() > 1:                                          # continue condition
-            self.e -= 0.4                                                   # increase weight
-            self.OPEN.update(self.INCONS)
-            self.OPEN = {s: self.f_value(s) for s in self.OPEN}             # update f_value of OPEN set
+            self.e = self.schedule.next(self.e, *self.last_round)           # increase weight
+            self.OPEN.reprioritise(self.g, self.H, self.e, self.INCONS)     # move INCONS to OPEN, update f_value
 
             self.INCONS = dict()
             self.CLOSED = set()
             self.ImprovePath()                                              # improve path
             self.path.append(self.extract_path())
 
-        return self.path, self.visited
+        coords = self.space.coords
+        return self.path, [[coords(s) for s in v] for v in self.visited]
 
     def ImprovePath(self):
         """
@@ -60,24 +75,32 @@ class AraStar:
         """
 
         visited_each = []
+        cells, g, successors, jump = self.cells, self.g, self.space.successors, self.jump
+        t = time.perf_counter()
 
-        while True:
+        while self.OPEN:
             s, f_small = self.calc_smallest_f()
 
-            if self.f_value(self.s_goal) <= f_small:
+            if self.f_value(self.goal) <= f_small:
                 break
 
             self.OPEN.pop(s)
             self.CLOSED.add(s)
+            self.update_bound(s)
+
+            g_s = g[s]
+
+            edges = successors(s) if jump is None else jump.successors(s, self.PARENT[s])
 
-            for s_n in self.get_neighbor(s):
-                if s_n in self.obs:
+            for d, c, corner_a, corner_b in edges:
+                s_n = s + d
+                if cells[s_n] or cells[s + corner_a] or cells[s + corner_b]:
                     continue
 
-                new_cost = self.g[s] + self.cost(s, s_n)
+                new_cost = g_s + c
 
-                if s_n not in self.g or new_cost < self.g[s_n]:
-                    self.g[s_n] = new_cost
+                if new_cost < g[s_n]:
+                    g[s_n] = new_cost
                     self.PARENT[s_n] = s
                     visited_each.append(s_n)
 
@@ -85,17 +108,17 @@ class AraStar:
                         self.OPEN[s_n] = self.f_value(s_n)
                     else:
                         self.INCONS[s_n] = 0.0
+                    self.BOUND[s_n] = new_cost + self.h(s_n)
 
         self.visited.append(visited_each)
+        self.last_round = (time.perf_counter() - t, len(visited_each))
 
     def calc_smallest_f(self):
         """
         :return: node with smallest f_value in OPEN set.
         """
 
-        s_small = min(self.OPEN, key=self.OPEN.get)
-
-        return s_small, self.OPEN[s_small]
+        return self.OPEN.top()
 
     def get_neighbor(self, s):
         """
@@ -104,17 +127,32 @@ class AraStar:
         :return: neighbors
         """
 
-        return {(s[0] + u[0], s[1] + u[1]) for u in self.u_set}
+        return self.space.neighbors(s)
 
     def update_e(self):
+        """
+        e' = min(e, g(s_goal) / min(g(s) + h(s) for s in OPEN U INCONS)),
+        read from BOUND in O(log n), so it can be queried mid-search.
+        :return: suboptimality bound of the current solution
+        """
+
         v = float("inf")
 
-        if self.OPEN:
-            v = min(self.g[s] + self.h(s) for s in self.OPEN)
-        if self.INCONS:
-            v = min(v, min(self.g[s] + self.h(s) for s in self.INCONS))
+        if self.BOUND:
+            v = self.BOUND.top()[1]
+
+        return min(self.e, self.g[self.goal] / v)
+
+    def update_bound(self, s):
+        """
+        keep g(s) + h(s) in BOUND while s is in OPEN or INCONS.
+        :param s: state
+        """
 
-        return min(self.e, self.g[self.s_goal] / v)
+        if s in self.OPEN or s in self.INCONS:
+            self.BOUND[s] = self.g[s] + self.h(s)
+        else:
+            self.BOUND.pop(s, None)
 
     def f_value(self, x):
         """
@@ -129,19 +167,25 @@ class AraStar:
     def extract_path(self):
         """
         Extract the path based on the PARENT set.
-        :return: The planning path
+        :return: The planning path, [] if the goal was not reached
         """
 
+        if self.g[self.goal] == math.inf:
+            return []
+
         path = [self.s_goal]
-        s = self.s_goal
+        s = self.goal
 
         while True:
             s = self.PARENT[s]
-            path.append(s)
+            path.append(self.space.coords(s))
 
-            if s == self.s_start:
+            if s == self.start:
                 break
 
+        if self.jump is not None:
+            return self.jump.expand(path)                                   # fill in the cells between jump points
+
         return list(path)
 
     def h(self, s):
@@ -151,13 +195,21 @@ class AraStar:
         :return: heuristic function value
         """
 
+        h = self.H[s]
+        if h >= 0:
+            return h
+
         heuristic_type = self.heuristic_type                                # heuristic type
         goal = self.s_goal                                                  # goal node
+        x, y = s % self.x, s // self.x
 
         if heuristic_type == "manhattan":
-            return abs(goal[0] - s[0]) + abs(goal[1] - s[1])
+            h = abs(goal[0] - x) + abs(goal[1] - y)
         else:
-            return math.hypot(goal[0] - s[0], goal[1] - s[1])
+            h = math.hypot(goal[0] - x, goal[1] - y)
+
+        self.H[s] = h
+        return h
 
     def cost(self, s_start, s_goal):
         """
@@ -171,7 +223,7 @@ class AraStar:
         if self.is_collision(s_start, s_goal):
             return math.inf
 
-        return math.hypot(s_goal[0] - s_start[0], s_goal[1] - s_start[1])
+        return self.space.distance(s_start, s_goal)
 
     def is_collision(self, s_start, s_end):
         """
@@ -181,18 +233,16 @@ class AraStar:
         :return: True: is collision / False: not collision
         """
 
-        if s_start in self.obs or s_end in self.obs:
+        cells, w = self.cells, self.x
+
+        if cells[s_start] or cells[s_end]:
             return True
 
-        if s_start[0] != s_end[0] and s_start[1] != s_end[1]:
-            if s_end[0] - s_start[0] == s_start[1] - s_end[1]:
-                s1 = (min(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-            else:
-                s1 = (min(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
+        x1, y1, x2, y2 = s_start % w, s_start // w, s_end % w, s_end // w
 
-            if s1 in self.obs or s2 in self.obs:
+        if x1 != x2 and y1 != y2:
+            # diagonal move: both cells at the corners it cuts must be free
+            if cells[y2 * w + x1] or cells[y1 * w + x2]:
                 return True
 
         return False
@@ -210,4 +260,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
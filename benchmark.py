@@ -0,0 +1,288 @@
+"""
+Wall-clock benchmark of ARA* (with and without jump point search), LPA* and LPARA*.
+
+Every configuration of the matrix (size, connectivity, change rate, seed)
+is one seeded scenario, so all planners search the same worlds and runs on
+different commits can be diffed. LPA* and LPARA* are fed the same list of
+changed cells each round and time its repair together with the search;
+ARA* is not incremental and plans on the initial world only. For each run
+the time and expansions of every round, the path cost and (in a second,
+traced run) the peak memory are recorded. An expansion is a state popped
+from the open list, counted once per round for every planner.
+
+usage: python benchmark.py [-sizes 50,100] [-connected 4,8] [-percent-change 0.05,0.2]
+                           [-seeds 3] [-rounds 15] [-memory True] [-out data/benchmark.json]
+"""
+import os
+import sys
+import math
+import json
+import time
+import subprocess
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
+                "/../../Search_based_Planning/")
+
+import scenarios
+import ara_star
+import lpa_star
+import lpara_star_validation
+
+PARAMETERS = {
+    "e": 2.5,
+    "sizes": [50, 100],
+    "connected": [4, 8],
+    "percent-change": [0.05, 0.2],
+    "clump-size": "medium",
+    "coverage": 0.1,
+    "rounds": 15,
+    "seeds": 3,
+    "memory": True,
+    "out": "data/benchmark.json"
+}
+
+
+def parse_arguments():
+    if "-e" in sys.argv:
+        i = sys.argv.index("-e")
+        PARAMETERS["e"] = float(sys.argv[i + 1])
+    if "-sizes" in sys.argv:
+        i = sys.argv.index("-sizes")
+        PARAMETERS["sizes"] = [int(v) for v in sys.argv[i + 1].split(",")]
+    if "-connected" in sys.argv:
+        i = sys.argv.index("-connected")
+        PARAMETERS["connected"] = [int(v) for v in sys.argv[i + 1].split(",")]
+    if "-percent-change" in sys.argv:
+        i = sys.argv.index("-percent-change")
+        PARAMETERS["percent-change"] = [float(v) for v in sys.argv[i + 1].split(",")]
+    if "-clump-size" in sys.argv:
+        i = sys.argv.index("-clump-size")
+        PARAMETERS["clump-size"] = sys.argv[i + 1]
+    if "-coverage" in sys.argv:
+        i = sys.argv.index("-coverage")
+        PARAMETERS["coverage"] = float(sys.argv[i + 1])
+    if "-rounds" in sys.argv:
+        i = sys.argv.index("-rounds")
+        PARAMETERS["rounds"] = int(sys.argv[i + 1])
+    if "-seeds" in sys.argv:
+        i = sys.argv.index("-seeds")
+        PARAMETERS["seeds"] = int(sys.argv[i + 1])
+    if "-memory" in sys.argv:
+        i = sys.argv.index("-memory")
+        PARAMETERS["memory"] = sys.argv[i + 1] == "True"
+    if "-out" in sys.argv:
+        i = sys.argv.index("-out")
+        PARAMETERS["out"] = sys.argv[i + 1]
+
+
+def endpoints(size):
+    return (5, 5), (size - 5, size - 5)
+
+
+def world(config):
+    """
+    draw the scenario of a configuration and the cells its obstacle changes
+    toggle in every round.
+    :param config: (size, connected, percent_change, seed)
+    :return: scenario, changed cell ids per round
+    """
+
+    size, connected, percent_change, seed = config
+    s_start, s_goal = endpoints(size)
+    scenario = scenarios.load(size, PARAMETERS["coverage"], PARAMETERS["clump-size"], percent_change, seed)
+    lparastar = lpara_star_validation.LparaStar(
+        s_start, s_goal, PARAMETERS["e"], "euclidean", connected, size,
+        PARAMETERS["coverage"], PARAMETERS["clump-size"], percent_change, plot=False, scenario=scenario)
+
+    changes = []
+    for k in range(PARAMETERS["rounds"]):
+        before = bytes(lparastar.cells)
+        lparastar.change_all_obs(percent_change)
+        changes.append([s for s, (a, b) in enumerate(zip(before, lparastar.cells)) if a != b])
+
+    return scenario, changes
+
+
+def record_rounds(search, expanded):
+    """
+    wrap a search function to time every call.
+    :param search: function searching one round, e.g. planner.ImprovePath
+    :param expanded: returns the number of states popped in the current round
+    :return: the wrapped function, list that receives time and expansions per call
+    """
+
+    rounds = []
+
+    def timed(*args):
+        n, t = expanded(), time.perf_counter()
+        search(*args)
+        rounds.append({"time": time.perf_counter() - t, "expanded": expanded() - n})
+
+    return timed, rounds
+
+
+def toggle(planner, changed):
+    """
+    flip the occupancy of the changed cells in a planner's world.
+    :param changed: cell ids of one round
+    """
+
+    for s in changed:
+        if planner.cells[s]:
+            planner.obs.discard(planner.space.coords(s))
+        else:
+            planner.obs.add(planner.space.coords(s))
+
+
+def run_ara_star(config, scenario, changes, jps=False):
+    size, connected, percent_change, seed = config
+    s_start, s_goal = endpoints(size)
+    arastar = ara_star.AraStar(s_start, s_goal, PARAMETERS["e"], "euclidean", connected=connected, size=size,
+                               coverage=PARAMETERS["coverage"], obs=scenario.obs, jps=jps)
+    arastar.ImprovePath, rounds = record_rounds(arastar.ImprovePath, lambda: len(arastar.CLOSED))
+
+    path, visited = arastar.searching()
+
+    return path[-1], rounds
+
+
+def run_ara_star_jps(config, scenario, changes):
+    return run_ara_star(config, scenario, changes, jps=True)
+
+
+def run_lpa_star(config, scenario, changes):
+    size, connected, percent_change, seed = config
+    s_start, s_goal = endpoints(size)
+    lpastar = lpa_star.LPAStar(s_start, s_goal, "euclidean", connected, size, PARAMETERS["coverage"],
+                               obs=scenario.obs, plot=False)
+
+    def search(changed):
+        toggle(lpastar, changed)
+        affected = dict.fromkeys(changed)
+        for s in changed:
+            affected.update(dict.fromkeys(lpastar.space.neighbors(s)))
+        for s in affected:
+            lpastar.UpdateVertex(s)
+        lpastar.ComputeShortestPath()
+
+    search, rounds = record_rounds(search, lambda: len(lpastar.visited))
+
+    search([])
+    for changed in changes:
+        lpastar.visited = set()                                             # states popped this round
+        search(changed)
+
+    return lpastar.extract_path(), rounds
+
+
+def run_lpara_star(config, scenario, changes):
+    size, connected, percent_change, seed = config
+    s_start, s_goal = endpoints(size)
+    lparastar = lpara_star_validation.LparaStar(
+        s_start, s_goal, PARAMETERS["e"], "euclidean", connected, size,
+        PARAMETERS["coverage"], PARAMETERS["clump-size"], percent_change, plot=False, scenario=scenario)
+
+    def search(changed):
+        if changed:
+            toggle(lparastar, changed)
+            lparastar.s_changed.update(changed)
+            lparastar.apply_changes()
+        lparastar.ImprovePath()
+        lparastar.publish_path()
+
+    search, rounds = record_rounds(search, lambda: len(lparastar.CLOSED))
+
+    lparastar.init()
+    search([])
+    for changed in changes:                                                 # the rounds of searching(), on the given changes
+        if lparastar.e > 1:
+            lparastar.decrease_e()
+        lparastar.OPEN.reprioritise(lparastar.g, lparastar.H, lparastar.e, lparastar.INCONS, lparastar.rhs)
+        lparastar.INCONS = dict()
+        lparastar.CLOSED = set()                                            # states popped this round
+        search(changed)
+
+    return lparastar.best_path(), rounds
+
+
+PLANNERS = {
+    "ara_star": run_ara_star,
+    "ara_star_jps": run_ara_star_jps,
+    "lpa_star": run_lpa_star,
+    "lpara_star": run_lpara_star
+}
+
+
+def path_cost(path):
+    return sum(math.dist(a, b) for a, b in zip(path, path[1:]))
+
+
+def benchmark(name, config, scenario, changes):
+    """
+    :return: result record of one planner on one configuration
+    """
+
+    run = PLANNERS[name]
+    size, connected, percent_change, seed = config
+
+    t = time.perf_counter()
+    path, rounds = run(config, scenario, changes)
+    total_time = time.perf_counter() - t
+
+    peak_memory = None
+    if PARAMETERS["memory"]:
+        tracemalloc.start()
+        run(config, scenario, changes)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"planner": name,
+            "size": size,
+            "connected": connected,
+            "clump_size": PARAMETERS["clump-size"],
+            "coverage": PARAMETERS["coverage"],
+            "percent_change": percent_change if not name.startswith("ara_star") else 0.0,
+            "seed": seed,
+            "total_time": total_time,
+            "rounds": rounds,
+            "expanded": sum(r["expanded"] for r in rounds),
+            "path_found": bool(path),
+            "path_cost": path_cost(path) if path else None,
+            "peak_memory": peak_memory}
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parse_arguments()
+
+    results = []
+    for size in PARAMETERS["sizes"]:
+        for connected in PARAMETERS["connected"]:
+            for percent_change in PARAMETERS["percent-change"]:
+                for seed in range(PARAMETERS["seeds"]):
+                    config = (size, connected, percent_change, seed)
+                    scenario, changes = world(config)
+                    for name in PLANNERS:
+                        if name.startswith("ara_star") and percent_change != PARAMETERS["percent-change"][0]:
+                            continue                                        # static planner, one run per world
+                        if name == "ara_star_jps" and connected != 8:
+                            continue                                        # jump points need an 8-connected grid
+                        result = benchmark(name, config, scenario, changes)
+                        print(name, config, round(result["total_time"], 3), result["expanded"])
+                        results.append(result)
+
+    os.makedirs(os.path.dirname(PARAMETERS["out"]) or ".", exist_ok=True)
+    with open(PARAMETERS["out"], "w") as f:
+        json.dump({"commit": commit(), "parameters": PARAMETERS, "results": results}, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
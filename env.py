@@ -1,7 +1,195 @@
+import math
+import random
+from array import array
 from obstacles import OBSTACLES
-from random import randint
+
+SPARSE_SIZE = 1 << 20                                                   # grids above this many cells use sparse values
+
+
+class OccupancyGrid:
+    """
+    Obstacle map stored as one byte per cell in row-major order
+    (index y * x_range + x), so planners can read self.cells directly.
+    Also behaves like the set of obstacle coordinates it replaces;
+    cells outside the grid count as occupied.
+    """
+
+    def __init__(self, x_range, y_range, obs=()):
+        self.x_range, self.y_range = x_range, y_range
+        self.cells = bytearray(x_range * y_range)
+        self.count = 0
+
+        for s in obs:
+            self.add(s)
+
+    def __contains__(self, s):
+        x, y = s
+        if 0 <= x < self.x_range and 0 <= y < self.y_range:
+            return self.cells[y * self.x_range + x] == 1
+        return True
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        cells, w = self.cells, self.x_range
+        i = cells.find(1)
+        while i != -1:
+            yield i % w, i // w
+            i = cells.find(1, i + 1)
+
+    def add(self, s):
+        i = s[1] * self.x_range + s[0]
+        if not self.cells[i]:
+            self.cells[i] = 1
+            self.count += 1
+
+    def remove(self, s):
+        if s not in self:
+            raise KeyError(s)
+        self.discard(s)
+
+    def load(self, cells):
+        """
+        replace the whole grid, e.g. with the occupancy of a saved scenario.
+        :param cells: one byte per cell, same layout as self.cells
+        """
+
+        self.cells[:] = cells
+        self.count = self.cells.count(1)
+
+    def discard(self, s):
+        x, y = s
+        if 0 <= x < self.x_range and 0 <= y < self.y_range and self.cells[y * self.x_range + x]:
+            self.cells[y * self.x_range + x] = 0
+            self.count -= 1
+
+    def as_array(self):
+        """
+        :return: writable numpy uint8 view of the grid, indexed [y, x]
+        """
+
+        import numpy as np
+
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.y_range, self.x_range)
+
+
+class SparseValues(dict):
+    """
+    Per-state values that are only stored once written; every other state
+    reads as the default. Indexed like the arrays of StateSpace.values, so
+    planners use either without change, but memory and start-up time grow
+    with the states a search touches instead of with the grid.
+    """
+
+    __slots__ = ("default",)
+
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, s):
+        return self.default
+
+
+class StateSpace:
+    """
+    Flat integer ids for grid cells, s = y * x_range + x, matching the
+    OccupancyGrid layout. Planners keep g/rhs/parent in arrays indexed by
+    these ids; coordinates only appear at the API boundary.
+    """
+
+    def __init__(self, x_range, y_range, motions, sparse=None):
+        self.x_range, self.y_range = x_range, y_range
+        self.motions = motions
+        self.size = x_range * y_range
+        self.sparse = self.size > SPARSE_SIZE if sparse is None else sparse
+        self.edge_table, self.edge_class = self.build_edges()
+
+    def build_edges(self):
+        """
+        Precompute the successors of every cell for this connectivity.
+        Cells fall into 9 classes (interior, 4 borders, 4 corners) that
+        differ only in which motions leave the grid. Each class maps to a
+        tuple of edges (offset, cost, corner_a, corner_b): the successor
+        is s + offset, and the move is blocked if s + corner_a or
+        s + corner_b is an obstacle (the cells a diagonal move cuts;
+        both are 0 for straight moves).
+        :return: edge tuples per class, class of every cell
+        """
+
+        w, h = self.x_range, self.y_range
+        edge_table = []
+
+        for y_class in range(3):
+            for x_class in range(3):
+                edges = []
+                for dx, dy in self.motions:
+                    if (x_class == 0 and dx < 0) or (x_class == 2 and dx > 0) or \
+                            (y_class == 0 and dy < 0) or (y_class == 2 and dy > 0):
+                        continue
+                    corner_a, corner_b = (dx, dy * w) if dx and dy else (0, 0)
+                    edges.append((dy * w + dx, math.hypot(dx, dy), corner_a, corner_b))
+                edge_table.append(tuple(edges))
+
+        def row(y_class):
+            return bytes([3 * y_class]) + bytes([3 * y_class + 1]) * (w - 2) + bytes([3 * y_class + 2])
+
+        edge_class = row(0) + row(1) * (h - 2) + row(2)
+
+        return edge_table, edge_class
+
+    def successors(self, s):
+        """
+        :param s: state id
+        :return: precomputed edges (offset, cost, corner_a, corner_b) leaving s
+        """
+
+        return self.edge_table[self.edge_class[s]]
+
+    def index(self, s):
+        return s[1] * self.x_range + s[0]
+
+    def coords(self, s):
+        return s % self.x_range, s // self.x_range
+
+    def values(self, value):
+        """
+        :return: array of doubles with one entry per state, or
+                 SparseValues if the space is sparse
+        """
+
+        if self.sparse:
+            return SparseValues(value)
+
+        return array('d', [value]) * self.size
+
+    def parents(self):
+        """
+        :return: array of parent ids with one entry per state, -1 = no parent
+        """
+
+        if self.sparse:
+            return SparseValues(-1)
+
+        return array('i', [-1]) * self.size
+
+    def neighbors(self, s):
+        """
+        :param s: state id
+        :return: ids of the neighbors of s inside the grid
+        """
+
+        return [s + edge[0] for edge in self.edge_table[self.edge_class[s]]]
+
+    def distance(self, s_start, s_end):
+        w = self.x_range
+
+        return math.hypot(s_end % w - s_start % w, s_end // w - s_start // w)
+
+
 class Env:
-    def __init__(self, xI, xG, connected=8, size=50, coverage=0.1, clump_size='small'):
+    def __init__(self, xI, xG, connected=8, size=50, coverage=0.1, clump_size='small', sparse=None, rng=None, obs=None):
         self.x_range = size  # size of background
         self.y_range = size
         self.xI, self.xG = xI, xG
@@ -10,9 +198,17 @@ class Env:
                             (1, 0), (1, -1), (0, -1), (-1, -1)]
         else:
             self.motions = [(-1, 0), (0, 1), (1, 0), (0, -1)]
-        self.obs = self.obs_map(coverage)
+        self.space = StateSpace(self.x_range, self.y_range, self.motions, sparse)
+        self.rng = rng or random                                            # source of the random obstacles
+        if obs is None:
+            self.obs = self.obs_map(coverage)
+        else:
+            self.obs = OccupancyGrid(self.x_range, self.y_range)
+            self.obs.load(obs)
 
     def update_obs(self, obs):
+        if not isinstance(obs, OccupancyGrid):
+            obs = OccupancyGrid(self.x_range, self.y_range, obs)
         self.obs = obs
 
     def obs_map(self, coverage):
@@ -22,7 +218,7 @@ class Env:
         """
         x = self.x_range
         y = self.y_range
-        obs = set()
+        obs = OccupancyGrid(x, y)
         for i in range(x):
             obs.add((i, 0))
         for i in range(x):
@@ -34,10 +230,10 @@ class Env:
             obs.add((x - 1, i))
 
         while len(obs) / (x * y) < coverage:
-            segment = OBSTACLES[randint(0, len(OBSTACLES) - 1)]
+            segment = OBSTACLES[self.rng.randint(0, len(OBSTACLES) - 1)]
 
-            dx = randint(0, x)
-            dy = randint(0, y)
+            dx = self.rng.randint(0, x)
+            dy = self.rng.randint(0, y)
             for obs_x, obs_y in segment:
                 if obs_x + dx < x and obs_y + dy < y:
                     obs.add((obs_x + dx, obs_y + dy))
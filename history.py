@@ -0,0 +1,195 @@
+"""
+Policies for the visited-state history of the anytime planners.
+
+Every ImprovePath appends the states it visited (flat ids, in visit
+order) to planner.visited. The policy decides how much of that is kept:
+every iteration, only the counts, the last n iterations, or nothing in
+memory with every iteration streamed to a file for later replay.
+Whatever the policy, iterating a history yields one list per iteration,
+empty for those not held in memory, so it stays aligned with the paths
+published by the planner.
+"""
+import collections
+
+MAGIC = b"LPV1"
+
+
+class FullHistory(list):
+    """
+    keep every iteration, the original behaviour.
+    """
+
+    def counts(self):
+        """
+        :return: number of visited states per iteration
+        """
+
+        return [len(visited_each) for visited_each in self]
+
+    def size(self, k):
+        return len(self[k])
+
+    def get(self, k):
+        return self[k]
+
+
+class CountHistory:
+    """
+    keep only the number of states visited per iteration.
+    """
+
+    def __init__(self):
+        self.sizes = []
+
+    def append(self, visited_each):
+        self.sizes.append(len(visited_each))
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __iter__(self):
+        return ([] for _ in self.sizes)
+
+    def counts(self):
+        return list(self.sizes)
+
+    def size(self, k):
+        """
+        :return: number of states visited in iteration k
+        """
+
+        return self.sizes[k]
+
+    def get(self, k):
+        """
+        :return: visited states of iteration k, [] if they are not kept
+        """
+
+        return []
+
+
+class RingHistory(CountHistory):
+    """
+    keep the visited states of the last n iterations and the counts of all.
+    """
+
+    def __init__(self, n=5):
+        super().__init__()
+        self.kept = collections.deque(maxlen=n)
+
+    def append(self, visited_each):
+        super().append(visited_each)
+        self.kept.append(visited_each)
+
+    def __iter__(self):
+        dropped = len(self.sizes) - len(self.kept)
+        yield from ([] for _ in range(dropped))
+        yield from self.kept
+
+    def get(self, k):
+        k = k % len(self.sizes) if k < 0 else k
+        i = k - (len(self.sizes) - len(self.kept))
+
+        return self.kept[i] if 0 <= i < len(self.kept) else []
+
+
+class StreamHistory(CountHistory):
+    """
+    write every iteration to a file and keep only the counts in memory.
+
+    An iteration is stored as its number of states followed by the
+    differences between consecutive state ids, zigzag and varint encoded,
+    so neighbouring states (the common case) take one or two bytes.
+    The file is flushed after every iteration; read() replays it.
+    """
+
+    def __init__(self, file):
+        super().__init__()
+        self.file = open(file, "wb")
+        self.file.write(MAGIC)
+
+    def append(self, visited_each):
+        super().append(visited_each)
+        self.file.write(encode(visited_each))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def varint(n, out):
+    while n > 0x7f:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def encode(visited_each):
+    """
+    :return: bytes of one iteration: its length, then the zigzag-encoded deltas
+    """
+
+    out = bytearray()
+    varint(len(visited_each), out)
+    prev = 0
+    for s in visited_each:
+        d = s - prev
+        varint(d << 1 if d >= 0 else (-d << 1) - 1, out)
+        prev = s
+
+    return bytes(out)
+
+
+def read(file):
+    """
+    replay a file written by StreamHistory.
+    :return: generator of the visited state ids of every iteration
+    """
+
+    with open(file, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError("not a visited history file")
+
+    i = 4
+    while i < len(data):
+        n, i = read_varint(data, i)
+        visited_each, s = [], 0
+        for _ in range(n):
+            z, i = read_varint(data, i)
+            s += -((z + 1) >> 1) if z & 1 else z >> 1
+            visited_each.append(s)
+        yield visited_each
+
+
+def read_varint(data, i):
+    """
+    :return: the varint at data[i] and the index after it
+    """
+
+    n = shift = 0
+    while True:
+        b = data[i]
+        i += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+
+def policy(spec):
+    """
+    :param spec: "full", "counts", "ring:<n>" or "stream:<file>"
+    :return: a new history for that policy
+    """
+
+    name, _, arg = spec.partition(":")
+    if name == "full":
+        return FullHistory()
+    if name == "counts":
+        return CountHistory()
+    if name == "ring":
+        return RingHistory(int(arg)) if arg else RingHistory()
+    if name == "stream" and arg:
+        return StreamHistory(arg)
+    raise ValueError("unknown history policy: " + spec)
@@ -0,0 +1,438 @@
+"""
+Hierarchical path-finding A* (HPA*) for large grids.
+
+The grid is cut into square clusters. Free cell pairs across the border
+of two adjacent clusters form entrances, and every entrance contributes
+one or two transitions (a cell on each side, joined by a straight move).
+Inside a cluster the transitions are joined by their shortest paths that
+stay in the cluster. A query adds the start and goal to this abstract
+graph, searches it with A* and refines every abstract edge with a search
+bounded to one cluster, so the work depends on the number of clusters
+along the path rather than on the size of the grid.
+
+The abstract graph is built once, when the planner is set up, so a
+query only searches it. An obstacle change rebuilds the cluster it falls
+in, and the neighbouring cluster if it lies on their border, so repairs
+stay local too. Paths are near-optimal: they only cross cluster borders
+at transitions.
+"""
+import os
+import sys
+import math
+import heapq
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
+                "/../../Search_based_Planning/")
+
+from plotting import Plotting, plt
+from env import Env
+from priority_queue import PriorityQueue
+
+ENTRANCE_SPLIT = 6                                                          # entrances at least this wide get two transitions
+
+PARAMETERS = {
+    "connected": 8,
+    "size": 200,
+    "cluster-size": 10,
+    "clump-size": "medium",
+    "coverage": 0.1,
+    "plot": True
+}
+
+
+class ClusterGraph:
+    """
+    Abstract graph of an occupancy grid for HPA*. Clusters are numbered
+    row by row, c = cy * nx + cx; all other states are flat cell ids.
+    """
+
+    def __init__(self, space, cells, cluster_size=10):
+        self.space, self.cells = space, cells
+        self.w, self.h = space.x_range, space.y_range
+        self.size = cluster_size
+        self.nx = -(-self.w // cluster_size)
+        self.ny = -(-self.h // cluster_size)
+
+        self.borders = {}                                                   # (a, b), a < b -> transition pairs (s in a, t in b)
+        self.nodes = {}                                                     # c -> {transition: [its partners across borders]}
+        self.intra = {}                                                     # c -> {transition: {transition: cost inside c}}
+        self.diagonal = len(space.motions) == 8
+        self.expanded = 0                                                   # states expanded by the last plan()
+
+        self.build()
+
+    def cluster(self, s):
+        return (s // self.w // self.size) * self.nx + s % self.w // self.size
+
+    def bounds(self, c):
+        """
+        :return: x0, y0, x1, y1 of the cells of cluster c, x1 and y1 exclusive
+        """
+
+        x0, y0 = c % self.nx * self.size, c // self.nx * self.size
+
+        return x0, y0, min(x0 + self.size, self.w), min(y0 + self.size, self.h)
+
+    def adjacent(self, c):
+        """
+        :return: clusters sharing a border with c
+        """
+
+        cx, cy = c % self.nx, c // self.nx
+        if cx > 0:
+            yield c - 1
+        if cx < self.nx - 1:
+            yield c + 1
+        if cy > 0:
+            yield c - self.nx
+        if cy < self.ny - 1:
+            yield c + self.nx
+
+    def border(self, a, b):
+        """
+        :param a, b: adjacent clusters, a < b
+        :return: transition pairs (s, t) of their border, s in a and t in b
+        """
+
+        pairs = self.borders.get((a, b))
+        if pairs is not None:
+            return pairs
+
+        cells, w = self.cells, self.w
+        x0, y0, x1, y1 = self.bounds(a)
+        if a // self.nx == b // self.nx:
+            across = [y * w + x1 - 1 for y in range(y0, y1)]                # right column of a
+            step = 1
+        else:
+            across = [(y1 - 1) * w + x for x in range(x0, x1)]              # top row of a
+            step = w
+
+        pairs, run = [], []
+        for s in across + [None]:
+            if s is not None and not cells[s] and not cells[s + step]:
+                run.append(s)
+                continue
+            if run:
+                ends = [run[0], run[-1]] if len(run) >= ENTRANCE_SPLIT else [run[len(run) // 2]]
+                pairs.extend((s_a, s_a + step) for s_a in ends)
+                run = []
+
+        self.borders[(a, b)] = pairs
+        return pairs
+
+    def transitions(self, c):
+        """
+        :return: {transition cell of c: [cells it crosses to in adjacent clusters]}
+        """
+
+        nodes = self.nodes.get(c)
+        if nodes is not None:
+            return nodes
+
+        nodes = {}
+        for n in self.adjacent(c):
+            for s, t in self.border(min(c, n), max(c, n)):
+                if c > n:
+                    s, t = t, s
+                nodes.setdefault(s, []).append(t)
+
+        self.nodes[c] = nodes
+        return nodes
+
+    def intra_edges(self, s, c):
+        """
+        :param s: transition of cluster c
+        :return: {transition: cost} of the shortest paths from s to the
+                 other transitions of c that stay inside c
+        """
+
+        edges = self.intra.setdefault(c, {})
+        if s not in edges:
+            nodes = self.transitions(c)
+            dist = self.local(s, c, nodes)[0]
+            edges[s] = {t: dist[t] for t in nodes if t != s and t in dist}
+
+        return edges[s]
+
+    def heuristic(self, s, t):
+        """
+        :return: cost of the shortest move sequence from s to t on an empty
+                 grid: octile distance when 8-connected, manhattan when 4-connected
+        """
+
+        dx, dy = abs(s % self.w - t % self.w), abs(s // self.w - t // self.w)
+        if self.diagonal:
+            return max(dx, dy) + (math.sqrt(2) - 1) * min(dx, dy)
+
+        return dx + dy
+
+    def local(self, s, c, targets):
+        """
+        Dijkstra from s over the free cells of cluster c, stopping once
+        every target is settled.
+        :return: cost and parent of every settled state
+        """
+
+        cells, w, successors = self.cells, self.w, self.space.successors
+        x0, y0, x1, y1 = self.bounds(c)
+        dist, parent = {s: 0.0}, {s: s}
+        remaining = set(targets) - {s}
+        heap = [(0.0, s)]
+        done = set()
+
+        while heap and remaining:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            remaining.discard(u)
+            self.expanded += 1
+
+            for offset, cost, corner_a, corner_b in successors(u):
+                v = u + offset
+                if not (x0 <= v % w < x1 and y0 <= v // w < y1):
+                    continue
+                if cells[v] or cells[u + corner_a] or cells[u + corner_b]:
+                    continue
+                if d + cost < dist.get(v, math.inf):
+                    dist[v] = d + cost
+                    parent[v] = u
+                    heapq.heappush(heap, (d + cost, v))
+
+        return {u: dist[u] for u in done}, parent
+
+    def build(self, clusters=None):
+        """
+        compute the borders and intra-cluster edges up front, the HPA*
+        preprocessing step, so that plan() does not have to.
+        :param clusters: clusters to build, None = all
+        """
+
+        for c in range(self.nx * self.ny) if clusters is None else clusters:
+            for s in self.transitions(c):
+                self.intra_edges(s, c)
+        self.expanded = 0
+
+    def update(self, changed):
+        """
+        rebuild what an obstacle change invalidates: the intra-cluster
+        edges of its cluster and, for cells on a border, that border and
+        the transitions and edges of the cluster across it.
+        :param changed: ids of the cells that changed
+        :return: clusters repaired
+        """
+
+        repaired = set()
+        for s in changed:
+            c = self.cluster(s)
+            x, y = s % self.w, s // self.w
+            x0, y0, x1, y1 = self.bounds(c)
+            repaired.add(c)
+
+            for n in self.adjacent(c):
+                if n // self.nx == c // self.nx:
+                    on_border = x == (x0 if n < c else x1 - 1)
+                else:
+                    on_border = y == (y0 if n < c else y1 - 1)
+                if on_border:
+                    self.borders.pop((min(c, n), max(c, n)), None)
+                    repaired.add(n)
+
+        for c in repaired:
+            self.nodes.pop(c, None)
+            self.intra.pop(c, None)
+        self.build(repaired)
+
+        return repaired
+
+    def plan(self, start, goal):
+        """
+        :return: path as cell ids from goal to start, [] if there is none
+        """
+
+        self.expanded = 0
+        if self.cells[start] or self.cells[goal]:
+            return []
+
+        c_start, c_goal = self.cluster(start), self.cluster(goal)
+        targets = set(self.transitions(c_start))
+        if c_start == c_goal:
+            targets.add(goal)
+        start_edges = self.local(start, c_start, targets)[0]                # every settled cell, keep the targets
+        start_edges = {t: d for t, d in start_edges.items() if t in targets}
+        goal_edges = self.local(goal, c_goal, self.transitions(c_goal))[0]   # costs are symmetric
+        goal_edges = {t: d for t, d in goal_edges.items() if t in self.transitions(c_goal)}
+
+        g, parent = {start: 0.0}, {start: start}
+        OPEN = PriorityQueue()
+        OPEN[start] = self.heuristic(start, goal)
+        CLOSED = set()
+
+        while OPEN:
+            s, f = OPEN.top()
+            if s == goal:
+                break
+            OPEN.pop(s)
+            CLOSED.add(s)
+            self.expanded += 1
+
+            c = self.cluster(s)
+            edges = list(start_edges.items()) if s == start else list(self.intra_edges(s, c).items())
+            edges += [(t, self.space.distance(s, t)) for t in self.transitions(c).get(s, ())]
+            if c == c_goal and s in goal_edges:
+                edges.append((goal, goal_edges[s]))
+
+            for t, cost in edges:
+                if t in CLOSED or t == s:
+                    continue
+                if g[s] + cost < g.get(t, math.inf):
+                    g[t] = g[s] + cost
+                    parent[t] = s
+                    OPEN[t] = g[t] + self.heuristic(t, goal)
+
+        if goal not in g:
+            return []
+
+        nodes = [goal]
+        while nodes[-1] != start:
+            nodes.append(parent[nodes[-1]])
+
+        return self.refine(nodes)
+
+    def refine(self, nodes):
+        """
+        :param nodes: abstract path, goal first
+        :return: the cells of the path, goal first
+        """
+
+        path = [nodes[0]]
+        for s, t in zip(nodes, nodes[1:]):
+            c = self.cluster(s)
+            if c != self.cluster(t):
+                path.append(t)                                              # straight move across a border
+                continue
+
+            parent = self.local(s, c, (t,))[1]
+            segment = [t]
+            while segment[-1] != s:
+                segment.append(parent[segment[-1]])
+            path.extend(reversed(segment[:-1]))
+
+        return path
+
+
+class HpaStar:
+    def __init__(self, s_start, s_goal, connected=8, size=50, coverage=0.1, clump_size='small', cluster_size=10, rng=None, obs=None, plot=True):
+        self.s_start, self.s_goal = s_start, s_goal
+        self.clump_size = clump_size
+
+        self.Env = Env(s_start, s_goal, connected, size, coverage, clump_size, rng=rng, obs=obs)
+        self.plot = plot                                                    # False = headless, matplotlib is never loaded
+        self.Plot = Plotting(s_start, s_goal, environment=self.Env) if plot else None
+        self.fig = plt.figure() if plot else None
+        self.x, self.y = self.Env.x_range, self.Env.y_range
+        self.obs = self.Env.obs
+        self.cells = self.obs.cells                                         # occupancy grid, read directly
+        self.space = self.Env.space                                         # flat state ids
+        self.start, self.goal = self.space.index(s_start), self.space.index(s_goal)
+
+        self.graph = ClusterGraph(self.space, self.cells, cluster_size)
+        self.path = []                                                      # planning path
+        self.repaired = []                                                  # clusters repaired per obstacle change
+
+    def searching(self):
+        """
+        :return: path from goal to start as coordinates, [] if there is none
+        """
+
+        if self.plot:
+            self.fig.canvas.mpl_connect('button_press_event', self.on_press)
+            self.Plot.plot_grid("HPA*")
+
+        self.replan()
+
+        return self.path
+
+    def replan(self):
+        self.path = [self.space.coords(s) for s in self.graph.plan(self.start, self.goal)]
+
+        if self.plot:
+            self.Plot.plot_grid("HPA*")
+            self.Plot.plot_path(self.path)
+
+    def change_obs(self, x, y):
+        """
+        add a clump of obstacles centred on (x, y), or remove it if (x, y)
+        is an obstacle, and repair the clusters it touches.
+        """
+
+        changed = []
+        add = (x, y) not in self.obs
+        for (i, j) in self.get_clump(x, y):
+            if ((i, j) in self.obs) != add:
+                if add:
+                    self.obs.add((i, j))
+                else:
+                    self.obs.remove((i, j))
+                changed.append(self.space.index((i, j)))
+
+        self.repaired.append(len(self.graph.update(changed)))
+
+    def on_press(self, event):
+        x, y = event.xdata, event.ydata
+        if x is None or x < 0 or x > self.x - 1 or y < 0 or y > self.y - 1:
+            print("Please choose right area!")
+            return
+
+        x, y = int(x), int(y)
+        print("Change position: s =", x, ",", "y =", y)
+        self.change_obs(x, y)
+        self.replan()
+
+    def get_clump(self, x, y):
+        clump_dict = {'small': 0, 'medium': 1, 'large': 2}
+        delta = clump_dict[self.clump_size]
+        for i in range(x - delta, x + delta + 1):
+            for j in range(y - delta, y + delta + 1):
+                if i >= 0 and i < self.x and j >= 0 and j < self.y:
+                    yield (i, j)
+
+
+def parse_arguments():
+    if "-connected" in sys.argv:
+        i = sys.argv.index("-connected")
+        PARAMETERS["connected"] = int(sys.argv[i + 1])
+    if "-size" in sys.argv:
+        i = sys.argv.index("-size")
+        PARAMETERS["size"] = int(sys.argv[i + 1])
+    if "-cluster-size" in sys.argv:
+        i = sys.argv.index("-cluster-size")
+        PARAMETERS["cluster-size"] = int(sys.argv[i + 1])
+    if "-clump-size" in sys.argv:
+        i = sys.argv.index("-clump-size")
+        PARAMETERS["clump-size"] = sys.argv[i + 1]
+    if "-coverage" in sys.argv:
+        i = sys.argv.index("-coverage")
+        PARAMETERS["coverage"] = float(sys.argv[i + 1])
+    if "-plot" in sys.argv:
+        i = sys.argv.index("-plot")
+        PARAMETERS["plot"] = sys.argv[i + 1] == "True"
+
+
+def main():
+    parse_arguments()
+    size = PARAMETERS["size"]
+    s_start, s_goal = (5, 5), (size - 5, size - 5)
+
+    hpastar = HpaStar(s_start, s_goal, PARAMETERS["connected"], size, PARAMETERS["coverage"],
+                      PARAMETERS["clump-size"], PARAMETERS["cluster-size"], plot=PARAMETERS["plot"])
+    path = hpastar.searching()
+
+    print("Arguments: ", sys.argv)
+    print("path length: " + str(len(path)) + ", states expanded: " + str(hpastar.graph.expanded))
+    if PARAMETERS["plot"]:
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+import json
+import time
+
+from priority_queue import PriorityQueue, IndexedPriorityQueue
+
+PHASES = {
+    "apply_changes": "repair",                                              # LPARA* obstacle change repair
+    "ImprovePath": "search",
+    "ComputeShortestPath": "search",
+    "extract_path": "extract"
+}
+COUNTED = {
+    "UpdateVertex": "update_vertex",
+    "is_collision": "is_collision"
+}
+
+
+class CountingPriorityQueue(PriorityQueue):
+    """
+    PriorityQueue that counts priority assignments and removals.
+    """
+
+    def __setitem__(self, s, priority):
+        self.pushes += 1
+        super().__setitem__(s, priority)
+
+    def update(self, other):
+        other = dict(other)
+        pushes = self.pushes
+        super().update(other)
+        self.pushes = pushes + len(other)
+
+    def pop(self, s, *default):
+        if s in self.entries:
+            self.pops += 1
+        return super().pop(s, *default)
+
+
+class CountingIndexedPriorityQueue(IndexedPriorityQueue):
+    """
+    IndexedPriorityQueue that counts key assignments and removals.
+    """
+
+    def __setitem__(self, s, key):
+        self.pushes += 1
+        super().__setitem__(s, key)
+
+    def pop(self, s, *default):
+        if s in self.pos:
+            self.pops += 1
+        return super().pop(s, *default)
+
+
+class Instrumentation:
+    """
+    Counters and phase timers for a planner, attached to one instance.
+
+    The OPEN (or U) queue is switched to a counting subclass and the
+    planner's UpdateVertex, is_collision and phase methods are wrapped on
+    the instance, so an uninstrumented planner runs exactly the code it
+    did before. Every ImprovePath / ComputeShortestPath call starts a new
+    record with the counters and the time spent repairing changes,
+    searching and extracting the path until the next one.
+
+    is_collision counts calls of the method only; the collision checks
+    inlined in the search loops are not counted. edges_scanned counts the
+    edges handed out by the planner's successor lookups (space.successors,
+    and the jump points of an AraStar with jps), blocked or not: the edges
+    relaxed by expansions and the neighbors scanned for rhs and parents.
+    """
+
+    def __init__(self, planner):
+        self.planner = planner
+        self.counts = {"update_vertex": 0, "is_collision": 0, "edges_scanned": 0}
+        self.times = {"repair": 0.0, "search": 0.0, "extract": 0.0}
+        self.stack = []                                                     # [phase, start, time spent in nested phases]
+        self.records = []
+        self.start = None                                                   # totals when the open record started
+        self.e = None                                                       # weight of the open record
+
+        self.queue = planner.OPEN if hasattr(planner, "OPEN") else planner.U
+        if isinstance(self.queue, PriorityQueue):
+            self.queue.__class__ = CountingPriorityQueue
+        else:
+            self.queue.__class__ = CountingIndexedPriorityQueue
+        self.queue.pushes = self.queue.pops = 0
+
+        for name, counter in COUNTED.items():
+            if hasattr(planner, name):
+                setattr(planner, name, self.counted(getattr(planner, name), counter))
+        for name, phase in PHASES.items():
+            if hasattr(planner, name):
+                setattr(planner, name, self.timed(getattr(planner, name), phase, phase == "search"))
+        planner.space.successors = self.scanned(planner.space.successors)
+        if getattr(planner, "jump", None) is not None:
+            planner.jump.successors = self.scanned(planner.jump.successors)
+
+        planner.stats = self
+
+    def counted(self, method, counter):
+        counts = self.counts
+
+        def wrapper(*args):
+            counts[counter] += 1
+            return method(*args)
+
+        return wrapper
+
+    def scanned(self, successors):
+        counts = self.counts
+
+        def wrapper(*args):
+            edges = successors(*args)
+            counts["edges_scanned"] += len(edges)
+            return edges
+
+        return wrapper
+
+    def timed(self, method, phase, iteration):
+        def wrapper(*args):
+            if iteration:
+                self.close()
+                self.start = self.totals()
+                self.e = getattr(self.planner, "e", None)
+
+            self.stack.append([phase, time.perf_counter(), 0.0])
+            try:
+                return method(*args)
+            finally:
+                name, start, nested = self.stack.pop()
+                elapsed = time.perf_counter() - start
+                self.times[name] += elapsed - nested
+                if self.stack:
+                    self.stack[-1][2] += elapsed
+
+        return wrapper
+
+    def totals(self):
+        totals = dict(self.counts, heap_pushes=self.queue.pushes, heap_pops=self.queue.pops)
+        totals.update(("time_" + phase, t) for phase, t in self.times.items())
+
+        return totals
+
+    def close(self):
+        """
+        finish the open record with everything counted since it started.
+        """
+
+        if self.start is None:
+            return
+
+        totals = self.totals()
+        record = {key: totals[key] - self.start[key] for key in totals}
+        record["iteration"] = len(self.records)
+        if self.e is not None:
+            record["e"] = self.e
+        self.records.append(record)
+        self.start = None
+
+    def report(self):
+        """
+        edges_scanned stands in for the edges relaxed the request asked
+        for: it counts every edge handed out by a successor lookup,
+        including blocked edges and those that do not lower g or rhs, so
+        it is an upper bound on the successful relaxations.
+        :return: per-iteration records and the totals over all of them
+        """
+
+        self.close()
+
+        return {"iterations": self.records, "totals": self.totals()}
+
+    def dump(self, file):
+        with open(file, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+
+def attach(planner):
+    """
+    instrument a planner.
+    :return: its Instrumentation, also available as planner.stats
+    """
+
+    return Instrumentation(planner)
@@ -0,0 +1,152 @@
+"""
+Jump point search (JPS) successors for 8-connected grids.
+
+A state's successors are not its neighbours but the jump points reached
+by scanning from it in the directions left after symmetry pruning: the
+first cell on each straight or diagonal line where some other optimal
+path could branch off (a forced neighbour), or the goal. The search then
+only puts jump points on OPEN, and the cost of a successor is the length
+of the straight or diagonal line to it.
+
+Diagonal moves follow the planners' corner rule: both cells a diagonal
+move cuts must be free. Under that rule forced neighbours only appear on
+straight scans, and a diagonal scan stops where one of its two straight
+scans finds a jump point.
+"""
+import math
+
+
+class JumpPoints:
+    def __init__(self, space, cells, goal):
+        """
+        :param space: StateSpace of an 8-connected grid
+        :param cells: occupancy grid, one byte per state
+        :param goal: goal state id, always a jump point
+        """
+
+        if len(space.motions) != 8:
+            raise ValueError("jump point search needs an 8-connected grid")
+
+        self.space, self.cells = space, cells
+        self.w, self.h = space.x_range, space.y_range
+        self.goal = space.coords(goal)
+
+    def free(self, x, y):
+        return 0 <= x < self.w and 0 <= y < self.h and not self.cells[y * self.w + x]
+
+    def directions(self, x, y, dx, dy):
+        """
+        :param dx, dy: direction s was reached in, (0, 0) for the start
+        :return: directions left to scan from (x, y) after pruning
+        """
+
+        free = self.free
+
+        if not dx and not dy:
+            return [(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1)
+                    if (i or j) and free(x + i, y) and free(x, y + j)]
+
+        if dx and dy:
+            directions = []
+            if free(x, y + dy):
+                directions.append((0, dy))
+            if free(x + dx, y):
+                directions.append((dx, 0))
+            if len(directions) == 2:
+                directions.append((dx, dy))
+            return directions
+
+        directions = []
+        ahead = free(x + dx, y + dy)
+        if ahead:
+            directions.append((dx, dy))
+        for i, j in ((dy, dx), (-dy, -dx)):                                 # the two sides of the move
+            if free(x + i, y + j):
+                directions.append((i, j))
+                if ahead:
+                    directions.append((dx + i, dy + j))
+
+        return directions
+
+    def jump_straight(self, x, y, dx, dy):
+        """
+        :return: first jump point scanning from (x, y) along (dx, dy), None if there is none
+        """
+
+        free, goal = self.free, self.goal
+
+        while True:
+            x, y = x + dx, y + dy
+            if not free(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if dx:
+                if (free(x, y - 1) and not free(x - dx, y - 1)) or (free(x, y + 1) and not free(x - dx, y + 1)):
+                    return x, y
+            elif (free(x - 1, y) and not free(x - 1, y - dy)) or (free(x + 1, y) and not free(x + 1, y - dy)):
+                return x, y
+
+    def jump_diagonal(self, x, y, dx, dy):
+        """
+        :return: first jump point scanning from (x, y) along the diagonal (dx, dy), None if there is none
+        """
+
+        free, goal = self.free, self.goal
+
+        while free(x + dx, y) and free(x, y + dy):
+            x, y = x + dx, y + dy
+            if not free(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if self.jump_straight(x, y, dx, 0) or self.jump_straight(x, y, 0, dy):
+                return x, y
+
+        return None
+
+    def successors(self, s, parent):
+        """
+        :param s: state being expanded
+        :param parent: its parent, s or -1 if it has none
+        :return: edges to the jump points in the StateSpace.successors
+                 format (offset, cost, 0, 0); the lines to them are free
+        """
+
+        w = self.w
+        x, y = s % w, s // w
+        dx = dy = 0
+        if parent >= 0 and parent != s:
+            px, py = parent % w, parent // w
+            dx, dy = (x > px) - (x < px), (y > py) - (y < py)
+
+        successors = []
+        for i, j in self.directions(x, y, dx, dy):
+            if i and j:
+                point = self.jump_diagonal(x, y, i, j)
+            else:
+                point = self.jump_straight(x, y, i, j)
+            if point is not None:
+                successors.append(((point[1] - y) * w + point[0] - x, math.hypot(point[0] - x, point[1] - y), 0, 0))
+
+        return successors
+
+    @staticmethod
+    def expand(path):
+        """
+        :param path: coordinates of consecutive jump points
+        :return: the path with the cells between jump points filled in
+        """
+
+        if not path:
+            return []
+
+        cells = [path[0]]
+        for (x1, y1), (x2, y2) in zip(path, path[1:]):
+            dx, dy = (x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)
+            x, y = x1, y1
+            while (x, y) != (x2, y2):
+                x, y = x + dx, y + dy
+                cells.append((x, y))
+
+        return cells
@@ -1,40 +1,39 @@
 import os
 import sys
 import math
-import matplotlib.pyplot as plt
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
                 "/../../Search_based_Planning/")
 
 import plotting
 import env
+from plotting import plt
+from priority_queue import IndexedPriorityQueue
 
 
 class LPAStar:
-    def __init__(self, s_start, s_goal, heuristic_type):
+    def __init__(self, s_start, s_goal, heuristic_type, connected=8, size=50, coverage=0.1, rng=None, obs=None, plot=True):
         self.s_start, self.s_goal = s_start, s_goal
         self.heuristic_type = heuristic_type
 
-        self.Plot = plotting.Plotting(self.s_start, self.s_goal)
-        self.Env = self.Plot.env
+        self.Env = env.Env(self.s_start, self.s_goal, connected, size, coverage, rng=rng, obs=obs)
+        self.Plot = plotting.Plotting(self.s_start, self.s_goal, environment=self.Env) if plot else None
         self.u_set = self.Env.motions
         self.obs = self.Env.obs
+        self.cells = self.obs.cells
         self.x = self.Env.x_range
         self.y = self.Env.y_range
+        self.space = self.Env.space
+        self.start, self.goal = self.space.index(s_start), self.space.index(s_goal)
 
-        self.g, self.rhs, self.U = {}, {}, {}
+        self.g, self.rhs, self.U = self.space.values(math.inf), self.space.values(math.inf), IndexedPriorityQueue()
 
-        for i in range(self.Env.x_range):
-            for j in range(self.Env.y_range):
-                self.rhs[(i, j)] = float("inf")
-                self.g[(i, j)] = float("inf")
-
-        self.rhs[self.s_start] = 0
-        self.U[self.s_start] = self.CalculateKey(self.s_start)
+        self.rhs[self.start] = 0
+        self.U[self.start] = self.CalculateKey(self.start)
         self.visited = set()
         self.count = 0
 
-        self.fig = plt.figure()
+        self.fig = plt.figure() if plot else None
 
     def run(self):
         self.Plot.plot_grid("Lifelong Planning A*")
@@ -56,31 +55,37 @@ class LPAStar:
             self.visited = set()
             self.count += 1
 
+            s = self.space.index((x, y))
+
             if (x, y) not in self.obs:
                 self.obs.add((x, y))
             else:
                 self.obs.remove((x, y))
-                self.UpdateVertex((x, y))
+                self.UpdateVertex(s)
 
             self.Plot.update_obs(self.obs)
 
-            for s_n in self.get_neighbor((x, y)):
+            for s_n in self.get_neighbor(s):
                 self.UpdateVertex(s_n)
 
             self.ComputeShortestPath()
 
-            plt.cla()
+            path = self.extract_path()
+            if not path:
+                print("Goal is unreachable!")
+
             self.Plot.plot_grid("Lifelong Planning A*")
             self.plot_visited(self.visited)
-            self.plot_path(self.extract_path())
-            self.fig.canvas.draw_idle()
+            self.plot_path(path)
 
     def ComputeShortestPath(self):
-        while True:
+        cells, successors = self.cells, self.space.successors
+
+        while self.U:
             s, v = self.TopKey()
 
-            if v >= self.CalculateKey(self.s_goal) and \
-                    self.rhs[self.s_goal] == self.g[self.s_goal]:
+            if v >= self.CalculateKey(self.goal) and \
+                    self.rhs[self.goal] == self.g[self.goal]:
                 break
 
             self.U.pop(s)
@@ -98,8 +103,9 @@ class LPAStar:
                 self.g[s] = float("inf")
                 self.UpdateVertex(s)
 
-            for s_n in self.get_neighbor(s):
-                self.UpdateVertex(s_n)
+            for d, c, corner_a, corner_b in successors(s):
+                if not cells[s + d]:
+                    self.UpdateVertex(s + d)
 
     def UpdateVertex(self, s):
         """
@@ -107,35 +113,53 @@ class LPAStar:
         :param s: state s
         """
 
-        if s != self.s_start:
+        if s != self.start:
 
             # Condition: cost of parent of s changed
             # Since we do not record the children of a state, we need to enumerate its neighbors
-            self.rhs[s] = min(self.g[s_n] + self.cost(s_n, s)
-                              for s_n in self.get_neighbor(s))
-
-        if s in self.U:
-            self.U.pop(s)
+            self.rhs[s] = self.calc_rhs(s)
 
         if self.g[s] != self.rhs[s]:
 
             # Condition: current cost to come is different to that of last time
-            # state s should be added into OPEN set (set U)
+            # state s should be added into OPEN set (set U), or have its key updated
             self.U[s] = self.CalculateKey(s)
+        elif s in self.U:
+            self.U.pop(s)
+
+    def calc_rhs(self, s):
+        """
+        :param s: state s
+        :return: min over predecessors s_n of g(s_n) + c(s_n, s)
+        """
+
+        cells, g = self.cells, self.g
+
+        if cells[s]:
+            return float("inf")
+
+        rhs = float("inf")
+        for d, c, corner_a, corner_b in self.space.successors(s):
+            s_n = s + d
+            if g[s_n] + c < rhs and not (cells[s_n] or cells[s + corner_a] or cells[s + corner_b]):
+                rhs = g[s_n] + c
+
+        return rhs
 
     def TopKey(self):
         """
         :return: return the min key and its value.
         """
 
-        s = min(self.U, key=self.U.get)
-
-        return s, self.U[s]
+        return self.U.top()
 
     def CalculateKey(self, s):
 
-        return [min(self.g[s], self.rhs[s]) + self.h(s),
-                min(self.g[s], self.rhs[s])]
+        k2 = min(self.g[s], self.rhs[s])
+
+        # rounded, so that sums of edge costs that are equal in exact
+        # arithmetic also compare equal when checking for termination
+        return round(k2 + self.h(s), 9), round(k2, 9)
 
     def get_neighbor(self, s):
         """
@@ -144,14 +168,9 @@ class LPAStar:
         :return: neighbors
         """
 
-        s_list = set()
+        cells = self.cells
 
-        for u in self.u_set:
-            s_next = tuple([s[i] + u[i] for i in range(2)])
-            if s_next not in self.obs:
-                s_list.add(s_next)
-
-        return s_list
+        return [s_n for s_n in self.space.neighbors(s) if not cells[s_n]]
 
     def h(self, s):
         """
@@ -162,11 +181,12 @@ class LPAStar:
 
         heuristic_type = self.heuristic_type  # heuristic type
         goal = self.s_goal  # goal node
+        x, y = s % self.x, s // self.x
 
         if heuristic_type == "manhattan":
-            return abs(goal[0] - s[0]) + abs(goal[1] - s[1])
+            return abs(goal[0] - x) + abs(goal[1] - y)
         else:
-            return math.hypot(goal[0] - s[0], goal[1] - s[1])
+            return math.hypot(goal[0] - x, goal[1] - y)
 
     def cost(self, s_start, s_goal):
         """
@@ -180,52 +200,59 @@ class LPAStar:
         if self.is_collision(s_start, s_goal):
             return float("inf")
 
-        return math.hypot(s_goal[0] - s_start[0], s_goal[1] - s_start[1])
+        return self.space.distance(s_start, s_goal)
 
     def is_collision(self, s_start, s_end):
-        if s_start in self.obs or s_end in self.obs:
+        cells, w = self.cells, self.x
+
+        if cells[s_start] or cells[s_end]:
             return True
 
-        if s_start[0] != s_end[0] and s_start[1] != s_end[1]:
-            if s_end[0] - s_start[0] == s_start[1] - s_end[1]:
-                s1 = (min(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-            else:
-                s1 = (min(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
+        x1, y1, x2, y2 = s_start % w, s_start // w, s_end % w, s_end // w
 
-            if s1 in self.obs or s2 in self.obs:
+        if x1 != x2 and y1 != y2:
+            # diagonal move: both cells at the corners it cuts must be free
+            if cells[y2 * w + x1] or cells[y1 * w + x2]:
                 return True
 
         return False
 
     def extract_path(self):
         """
-        Extract the path based on the PARENT set.
-        :return: The planning path
+        Extract the path by following the predecessor minimising
+        g(s_n) + c(s_n, s) back from the goal. g strictly decreases along
+        the way, so the walk ends at the start or stops where it cannot.
+        :return: The planning path, [] if the goal cannot be reached
         """
 
-        path = [self.s_goal]
-        s = self.s_goal
-
-        for k in range(100):
-            g_list = {}
-            for x in self.get_neighbor(s):
-                if not self.is_collision(s, x):
-                    g_list[x] = self.g[x]
-            s = min(g_list, key=g_list.get)
-            path.append(s)
-            if s == self.s_start:
-                break
+        cells, g, successors = self.cells, self.g, self.space.successors
+
+        if g[self.goal] == math.inf:
+            return []
+
+        path = [self.goal]
+        s = self.goal
+
+        while s != self.start:
+            g_min, s_min = math.inf, -1
+
+            for d, c, corner_a, corner_b in successors(s):
+                s_n = s + d
+                if g[s_n] + c < g_min and g[s_n] < g[s] and \
+                        not (cells[s_n] or cells[s + corner_a] or cells[s + corner_b]):
+                    g_min, s_min = g[s_n] + c, s_n
+
+            if s_min < 0:
+                return []
+
+            path.append(s_min)
+            s = s_min
 
-        return list(reversed(path))
+        coords = self.space.coords
+        return [coords(s) for s in reversed(path)]
 
     def plot_path(self, path):
-        px = [x[0] for x in path]
-        py = [x[1] for x in path]
-        plt.plot(px, py, linewidth=2)
-        plt.plot(self.s_start[0], self.s_start[1], "bs")
-        plt.plot(self.s_goal[0], self.s_goal[1], "gs")
+        self.Plot.plot_path(path)
 
     def plot_visited(self, visited):
         color = ['gainsboro', 'lightgray', 'silver', 'darkgray',
@@ -235,8 +262,7 @@ class LPAStar:
         if self.count >= len(color) - 1:
             self.count = 0
 
-        for x in visited:
-            plt.plot(x[0], x[1], marker='s', color=color[self.count])
+        self.Plot.plot_visited([self.space.coords(s) for s in visited], color[self.count])
 
 
 def main():
@@ -1,13 +1,17 @@
 import os
 import sys
 import math
+import heapq
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
                 "/../../Search_based_Planning/")
 
-from plotting import Plotting
+from plotting import Plotting, plt
 from env import Env
-import matplotlib.pyplot as plt
+from priority_queue import PriorityQueue
+from schedules import FixedStep
+from history import FullHistory
 
 PARAMETERS = {
     "e": 2.5, 
@@ -17,49 +21,67 @@ PARAMETERS = {
     "coverage": 0.1
 }
 class LparaStar:
-    def __init__(self, s_start, s_goal, e, heuristic_type, connected=8, size=50, coverage=0.1, clump_size='small'):
+    def __init__(self, s_start, s_goal, e, heuristic_type, connected=8, size=50, coverage=0.1, clump_size='small', schedule=None, rng=None, obs=None, plot=True, history=None):
         self.s_start, self.s_goal = s_start, s_goal
         self.heuristic_type = heuristic_type
 
         self.e = e
+        self.schedule = schedule or FixedStep(0.1)                          # how e decreases between ImprovePath calls
+        self.last_round = (0.0, 0)                                          # time and expansions of the last ImprovePath
         self.new_env_changes = False
         self.s_changed = set()
+        self.freed = set()                                                  # changed cells that are now free, per batch
         self.connected, self.size, self.coverage, self.clump_size = connected, size, coverage, clump_size
 
-        self.Plot = Plotting(self.s_start, self.s_goal, self.connected, self.size, self.coverage, self.clump_size) 
-        self.Env = self.Plot.env
+        self.Env = Env(self.s_start, self.s_goal, self.connected, self.size, self.coverage, self.clump_size, rng=rng, obs=obs)
+        self.plot = plot                                                    # False = headless, matplotlib is never loaded
+        self.Plot = Plotting(self.s_start, self.s_goal, environment=self.Env) if plot else None
         self.x = self.Env.x_range
         self.y = self.Env.y_range
         self.u_set = self.Env.motions                                       # feasible input set
-        self.obs = self.Env.obs   
-        self.fig = plt.figure()                                                                                          
+        self.obs = self.Env.obs
+        self.cells = self.obs.cells                                         # occupancy grid, read directly
+        self.space = self.Env.space                                         # flat state ids
+        self.start, self.goal = self.space.index(s_start), self.space.index(s_goal)
+        self.fig = plt.figure() if plot else None
+        self.num_expanded = 0
+        self.coalesced = []                                                 # redundant updates avoided per change batch
 
         self.colors_visited = Plotting.colors_visited()
         self.colors_path = Plotting.colors_path()
-        self.g = dict()                                                     # Cost to come
-        self.OPEN = dict()                                                  # priority queue / OPEN set
+        self.g = self.space.values(math.inf)                                # Cost to come
+        self.rhs = self.space.values(math.inf)                              # one-step lookahead of g
+        self.H = self.space.values(-1.0)                                    # cached heuristic, -1 = not yet computed
+        self.OPEN = PriorityQueue()                                         # priority queue / OPEN set
         self.CLOSED = set()                                                 # CLOSED set
         self.INCONS = {}                                                    # INCONSISTENT set
-        self.PARENT = dict()                                                # relations
+        self.BOUND = PriorityQueue()                                        # g + h over OPEN U INCONS
+        self.PARENT = self.space.parents()                                  # relations
         self.path = []                                                      # planning path
-        self.visited = []                                                   # order of visited nodes
+        self.visited = history if history is not None else FullHistory()   # order of visited nodes, per iteration
+        self.deadline = None                                                # time.perf_counter() to stop at, None = no limit
+        self.e_bound = math.inf                                             # e' of the best path, inf = none yet
+        self.e_done = math.inf                                              # e of the last ImprovePath that ran to completion
+        self.interrupted = False                                            # last ImprovePath was cut off by the deadline
+        self.started = False                                                # init() and the first ImprovePath have run
 
     def init(self):
         """
         initialize each set.
         """
 
-        for i in range(self.Env.x_range):
-            for j in range(self.Env.y_range):
-                self.g[(i, j)] = math.inf
-
-        self.g[self.s_start] = 0.0
-        self.OPEN[self.s_start] = self.f_value(self.s_start)
-        self.PARENT[self.s_start] = self.s_start
+        self.g[self.start] = 0.0
+        self.rhs[self.start] = 0.0
+        self.OPEN[self.start] = self.f_value(self.start)
+        self.update_bound(self.start)
+        self.PARENT[self.start] = self.start
 
     def plot_progress(self):
+        if not self.plot:
+            return
         k = len(self.visited) - 1
-        self.Plot.plot_visited(self.visited[k], self.colors_visited[k % len(self.colors_visited)])
+        visited = [self.space.coords(s) for s in self.visited.get(k)]
+        self.Plot.plot_visited(visited, self.colors_visited[k % len(self.colors_visited)])
         self.Plot.plot_path(self.path[k], self.colors_path[k % len(self.colors_path)], True)
         plt.pause(0.5) 
 
@@ -75,13 +97,11 @@ class LparaStar:
         if (x, y) not in self.obs:
             for (i, j) in self.get_clump(x, y):
                 self.obs.add((i, j))
-                self.s_changed.add((i, j))
-                plt.plot(i, j, "sk")
+                self.s_changed.add(self.space.index((i, j)))
         else:
             for (i, j) in self.get_clump(x, y):
                 self.obs.remove((i, j))
-                self.s_changed.add((i, j))
-                plt.plot(i, j, "sw")
+                self.s_changed.add(self.space.index((i, j)))
 
         self.Plot.update_obs(self.obs)
 
@@ -94,108 +114,279 @@ class LparaStar:
                     yield (i, j)
 
 
-    def searching(self):
-        self.init()
-        self.fig.canvas.mpl_connect('button_press_event', self.on_press)
-        self.Plot.plot_grid("LPARA*")
-        self.ImprovePath()
-        self.path.append(self.extract_path())
-        self.plot_progress()
+    def searching(self, deadline=None):
+        """
+        :param deadline: time.perf_counter() value at which planning stops,
+                         even in the middle of ImprovePath; None = no limit
+        :return: paths published so far, visited nodes per ImprovePath
+        """
+
+        self.deadline = deadline
+        if not self.started:
+            self.started = True
+            self.init()
+            self.schedule.reset()
+            if self.plot:
+                self.fig.canvas.mpl_connect('button_press_event', self.on_press)
+                self.Plot.plot_grid("LPARA*")
+            self.ImprovePath()
+            self.publish_path()
+            self.plot_progress()
+        elif self.interrupted or self.new_env_changes:
+            self.ImprovePath()                                              # finish the cut-off round / repair at the same e
+            self.publish_path()
+            self.plot_progress()
 
-        while self.update_e() > 1:  
+        while self.update_e() > 1 and not self.expired():
         # for i in range(3):                                        # continue condition
-            self.e -= 0.1 
-            self.OPEN.update(self.INCONS)
-            self.OPEN = {s: self.f_value(s) for s in self.OPEN}             # update f_value of OPEN set
+            self.decrease_e()
+            self.OPEN.reprioritise(self.g, self.H, self.e, self.INCONS, self.rhs)   # move INCONS to OPEN, update f_value
 
             self.INCONS = dict()
             self.CLOSED = set()
             self.ImprovePath()                                    
-            self.path.append(self.extract_path())
+            self.publish_path()
             self.plot_progress()
 
-        return self.path, self.visited
+        return self.path, self.visited_coords()
+
+    def plan_for(self, ms):
+        """
+        plan within a wall-clock budget. The search state is kept, so
+        calling this again (e.g. once per control cycle) continues from
+        where the last call stopped: an ImprovePath cut off by the
+        deadline is finished at the same e before e is decreased.
+        :param ms: time budget in milliseconds
+        :return: best path found so far, its e' suboptimality bound
+                 (inf if there is no path)
+        """
+
+        self.searching(time.perf_counter() + ms / 1000.0)
+        path = self.best_path()
+
+        return path, self.e_bound if path else math.inf
+
+    def decrease_e(self):
+        """
+        move e to the next value of the schedule, sized from the cost of
+        the last ImprovePath and the time left before the deadline.
+        """
+
+        remaining = None if self.deadline is None else self.deadline - time.perf_counter()
+        self.e = self.schedule.next(self.e, *self.last_round, remaining)
+
+    def expired(self):
+        """
+        :return: True if the deadline of the current search has passed
+        """
+
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def publish_path(self):
+        """
+        extract the current e'-suboptimal solution and record its bound.
+        The bound is g(goal) / min(g + h) over OPEN U INCONS, capped by
+        the e of the last ImprovePath that ran to completion; an
+        interrupted round guarantees nothing about its own e.
+        :return: the path, [] if the goal is not reached yet
+        """
+
+        path = self.extract_path()
+        self.path.append(path)
+
+        if path:
+            v = self.BOUND.top()[1] if self.BOUND else math.inf
+            self.e_bound = max(1.0, min(self.e_done, self.g[self.goal] / v))
+
+        return path
+
+    def best_path(self):
+        """
+        :return: the latest non-empty published path, [] if there is none
+                 or obstacles added since block it
+        """
+
+        for path in reversed(self.path):
+            if path:
+                return path if self.path_free(path) else []
+
+        return []
 
-    def UpdateVertex(self, s):
+    def path_free(self, path):
+        """
+        :param path: coordinates
+        :return: True if no cell or move of path is blocked by the current obstacles
+        """
+
+        ids = [self.space.index(p) for p in path]
+        if any(self.cells[s] for s in ids):
+            return False
+
+        return not any(self.is_collision(a, b) for a, b in zip(ids, ids[1:]))
+
+    def UpdateVertex(self, s, pushes=None):
         """
         update the status and the current cost to come of state s.
         :param s: state s
+        :param pushes: if given, new OPEN entries are collected here
+                       instead of being pushed one by one
         """
-        if s in self.OPEN:
-            self.OPEN.pop(s)
-        if s in self.obs:
-            self.g[s] = math.inf
+        queued = self.OPEN.pop(s, None) is not None                         # its successors are not relaxed yet
+        if self.cells[s]:
+            self.g[s] = self.rhs[s] = math.inf
+            self.PARENT[s] = -1
+            self.update_bound(s)
             return
         
-        if s != self.s_start:
+        if s != self.start:
 
             # Condition: cost of parent of s changed
-            # Since we do not record the children of a state, we need to enumerate its neighbors
-            rhs = min(self.g[s_n] + self.cost(s_n, s)
-                              for s_n in self.get_neighbor(s))
+            # The stored rhs holds unless s was just freed or the edge from its parent
+            # was cut; only then are all neighbors enumerated for the best back-pointer
+            s_p = self.PARENT[s]
+            if s in self.s_changed or s_p < 0 or self.is_collision(s_p, s) or \
+                    self.g[s_p] + self.space.distance(s_p, s) != self.rhs[s]:
+                self.rhs[s], s_p = self.best_parent(s)
+                if s_p >= 0:
+                    self.PARENT[s] = s_p
+            elif self.freed:
+                self.relax_opened(s)
+        else:
+            self.rhs[s] = 0.0
+
+        if self.g[s] != self.rhs[s] or queued:
+
+            # Condition: current cost to come is different to that of last time,
+            # or s still has to be expanded: state s should be added into OPEN set
+            if pushes is None:
+                self.OPEN[s] = self.f_value(s)
+            else:
+                pushes[s] = self.f_value(s)
+            self.BOUND[s] = min(self.g[s], self.rhs[s]) + self.h(s)
         else:
-            rhs = 0
+            self.update_bound(s)
+
+    def apply_changes(self):
+        """
+        repair the vertices affected by the obstacle changes in s_changed
+        as one batch. Overlapping clumps share most of their neighbors, so
+        the affected set is deduplicated first: each vertex is updated once
+        and the new OPEN entries are merged in a single step.
+        num_expanded still counts every changed cell and each of its
+        neighbors, so it stays comparable with the recorded statistics.
+        :return: number of redundant UpdateVertex calls avoided
+        """
+
+        affected = dict.fromkeys(self.s_changed)
+        self.freed = {s for s in self.s_changed if not self.cells[s]}
+        requested = len(affected)
+
+        for s in self.s_changed:
+            neighbors = self.get_neighbor(s)
+            requested += len(neighbors)
+            affected.update(dict.fromkeys(neighbors))
+
+        pushes = {}
+        for s in affected:
+            self.UpdateVertex(s, pushes)
+        self.OPEN.update(pushes)
 
-        if self.g[s] != rhs:
+        self.num_expanded += requested                                      # counted per request, as before batching
+        self.coalesced.append(requested - len(affected))
+        self.s_changed = set()
+        self.freed = set()
+        self.new_env_changes = False
 
-            # Condition: current cost to come is different to that of last time
-            # state s should be added into OPEN set 
-            self.OPEN[s] = self.f_value(s)
+        return self.coalesced[-1]
 
     def ImprovePath(self):
         """
+        A state popped from OPEN is made consistent first, as in LPA*'s
+        ComputeShortestPath: an over-consistent state (g > rhs, e.g. freed)
+        takes g = rhs and is expanded, an under-consistent one (g < rhs,
+        its parent was cut) gets g = inf and is queued again together with
+        its successors. The search ends once the goal is consistent and
+        no key in OPEN is below its f_value.
         :return: a e'-suboptimal path
         """
         visited_each = []
+        cells, g, rhs, successors = self.cells, self.g, self.rhs, self.space.successors
+        deadline = self.deadline
+        t, num_expanded = time.perf_counter(), self.num_expanded
+        self.interrupted = False
 
-        while True and len(self.OPEN) != 0:
+        while True:
             if self.new_env_changes:
-                for s in self.s_changed:
-                    self.UpdateVertex(s)
-                
-                    for s_n in self.get_neighbor(s):
-                        self.UpdateVertex(s_n)
+                self.apply_changes()                                        # even if OPEN ran empty, changes may reopen it
+            if len(self.OPEN) == 0:
+                break
 
-                self.s_changed = set()
-                self.new_env_changes = False
+            if deadline is not None and time.perf_counter() >= deadline:
+                self.interrupted = True
+                break
 
             s, f_small = self.calc_smallest_f()
 
-            if self.f_value(self.s_goal) <= f_small:
+            if f_small[0] == math.inf or (self.f_value(self.goal) <= f_small and g[self.goal] == rhs[self.goal]):
                 break
 
-
             self.OPEN.pop(s)
-            self.CLOSED.add(s)
-            if s in self.obs:
+            if cells[s]:
+                self.update_bound(s)
                 continue
 
-            for s_n in self.get_neighbor(s):
-                if s_n in self.obs:
-                    continue
+            if g[s] < rhs[s]:
+
+                # Condition: under-consistent (its parent was cut)
+                # forget g(s), queue s again at rhs(s) and update the states that may depend on it
+                g[s] = math.inf
+                self.UpdateVertex(s)
+                for d, c, corner_a, corner_b in successors(s):
+                    if not cells[s + d]:
+                        self.UpdateVertex(s + d)
+                continue
+
+            if g[s] > rhs[s]:
+
+                # Condition: over-consistent (e.g. freed cells)
+                g[s] = rhs[s]
+
+            self.CLOSED.add(s)
+            self.update_bound(s)
+            g_s = g[s]
 
-                new_cost = self.g[s] + self.cost(s, s_n)
+            for d, c, corner_a, corner_b in successors(s):
+                s_n = s + d
+                if cells[s_n] or cells[s + corner_a] or cells[s + corner_b]:
+                    continue
 
-                if s_n not in self.g or new_cost < self.g[s_n]:
-                    self.g[s_n] = new_cost
+                new_cost = g_s + c
+                if new_cost < rhs[s_n]:
+                    rhs[s_n] = new_cost
                     self.PARENT[s_n] = s
+
+                if new_cost < g[s_n]:
+                    g[s_n] = new_cost
                     visited_each.append(s_n)
+                    self.num_expanded += 1
 
                     if s_n not in self.CLOSED:
                         self.OPEN[s_n] = self.f_value(s_n)
                     else:
                         self.INCONS[s_n] = 0.0
+                    self.BOUND[s_n] = min(new_cost, rhs[s_n]) + self.h(s_n)
 
         self.visited.append(visited_each)
+        self.last_round = (time.perf_counter() - t, self.num_expanded - num_expanded)
+        if not self.interrupted:
+            self.e_done = self.e
 
     def calc_smallest_f(self):
         """
         :return: node with smallest f_value in OPEN set.
         """
 
-        s_small = min(self.OPEN, key=self.OPEN.get)
-
-        return s_small, self.OPEN[s_small]
+        return self.OPEN.top()
 
     def get_neighbor(self, s):
         """
@@ -204,97 +395,210 @@ class LparaStar:
         :return: neighbors
         """
 
-        return {(s[0] + u[0], s[1] + u[1]) for u in self.u_set}
+        return self.space.neighbors(s)
 
     def update_e(self):
+        """
+        e' = min(e, g(s_goal) / min(g(s) + h(s) for s in OPEN U INCONS)),
+        read from BOUND in O(log n), so it can be queried mid-search.
+        :return: suboptimality bound of the current solution
+        """
+
         v = float("inf")
 
-        if self.OPEN:
-            v = min(self.g[s] + self.h(s) for s in self.OPEN)
-        if self.INCONS:
-            v = min(v, min(self.g[s] + self.h(s) for s in self.INCONS))
+        if self.BOUND:
+            v = self.BOUND.top()[1]
+
+        return min(self.e, self.g[self.goal] / v)
+
+    def update_bound(self, s):
+        """
+        keep min(g(s), rhs(s)) + h(s) in BOUND while s is in OPEN or INCONS.
+        :param s: state
+        """
 
-        return min(self.e, self.g[self.s_goal] / v)
+        if s in self.OPEN or s in self.INCONS:
+            self.BOUND[s] = min(self.g[s], self.rhs[s]) + self.h(s)
+        else:
+            self.BOUND.pop(s, None)
 
     def f_value(self, x):
         """
-        f = g + e * h
-        f = cost-to-come + weight * cost-to-go
+        f = min(g, rhs) + e * h
+        f = cost-to-come + weight * cost-to-go, where a state whose rhs
+        dropped below g (e.g. a freed cell) is keyed on its new cost.
+        An under-consistent state (g < rhs) is keyed on g + h instead, as
+        in AD*, and ahead of any other state with the same f: the states
+        its g was derived from are then popped before it, and before the
+        goal when their costs tie. Rounded like LPAStar.CalculateKey.
         :param x: current state
-        :return: f_value
+        :return: f_value and 0 if x is under-consistent, else 1
         """
 
-        return self.g[x] + self.e * self.h(x)
+        g, rhs = self.g[x], self.rhs[x]
+        if g < rhs:
+            return round(g + self.h(x), 9), 0
 
-    def CalculateKey(self, s):
-        return [min(self.g[s], self.rhs(s)) + self.h(s),
-                min(self.g[s], self.rhs(s))]
-    
-    def rhs(self, s):
-        return min(self.g[s_n] + self.cost(s_n, s)
-                for s_n in self.get_neighbor(s))
+        return round(rhs + self.e * self.h(x), 9), 1
+
+    def best_parent(self, s):
+        """
+        find the predecessor minimising g(s_n) + c(s_n, s).
+        :param s: state s
+        :return: rhs of s and its predecessor, -1 if none is reachable
+        """
+
+        cells, g = self.cells, self.g
+        rhs, parent = math.inf, -1
+
+        if cells[s]:
+            return rhs, parent
+
+        for d, c, corner_a, corner_b in self.space.successors(s):
+            s_n = s + d
+            if g[s_n] + c < rhs and not (cells[s_n] or cells[s + corner_a] or cells[s + corner_b]):
+                rhs, parent = g[s_n] + c, s_n
+
+        return rhs, parent
+
+    def relax_opened(self, s):
+        """
+        lower rhs of s over the diagonal edges into it whose corner was just
+        freed; its other edges are unchanged, so the stored rhs holds for them.
+        :param s: state s, not itself among the changed cells
+        """
+
+        cells, g, freed = self.cells, self.g, self.freed
+
+        for d, c, corner_a, corner_b in self.space.successors(s):
+            if s + corner_a in freed or s + corner_b in freed:
+                s_n = s + d
+                if g[s_n] + c < self.rhs[s] and not (cells[s_n] or cells[s + corner_a] or cells[s + corner_b]):
+                    self.rhs[s], self.PARENT[s] = g[s_n] + c, s_n
 
     def extract_path(self):
         """
-        Extract the path based on the PARENT set.
-        :return: The planning path
+        Extract the path by following PARENT back from the goal.
+        ImprovePath and UpdateVertex keep the pointers valid, so this is a
+        walk over the path; if a pointer is broken anyway (unset, blocked
+        or closing a cycle), only the rest of the path is searched again.
+        :return: The planning path, [] if the goal cannot be reached
         """
-        parents = self.extract_path_no_recurse()
-        path = []
-        current = self.s_start
-        while current is not None:
-            path.append(current)
-            current = parents[current]
-        return path
-    
-    def extract_path_better(self, goal, current_path, used, start):
-        # go backwards in path but keep track of ties
-        # when there are multiple options, try both paths
-        # at the end, choose the path that ends with s_start
-        g_list = {}
-        for x in self.get_neighbor(goal):
-            if x not in used and x[0] >= 0 and x[0] < self.x and x[1] >= 0 and x[1] < self.y:
-                g_list[x] = self.g[x]
-        if len(g_list) > 0 and len(current_path) < 100:
-            possible_s = []
-            min_val = g_list[min(g_list, key=g_list.get)]
-            if min_val == math.inf:
-                return [current_path]
-            for s in g_list:
-                if g_list[s] == min_val:
-                    possible_s.append(s)
-            if min_val == 0:
-                return [current_path + [end] for end in possible_s]
-            paths = []
-            for possible in possible_s:
-                for path in self.extract_path_better(possible, current_path + [possible], used | set([possible]), start):
-                    paths.append(path)
-                    if path[-1] == start:
-                        return paths
-            return paths       
-        else:
-            return [current_path]
-        
-    def extract_path_no_recurse(self):
-        # go backwards in path but keep track of ties
-        # when there are multiple options, try both paths
-        # at the end, choose the path that ends with s_start
-        parents = {self.s_goal: None}
-        agenda = [self.s_goal]
-        used = {self.s_goal}
-        while agenda:
-            current = agenda.pop(0)
-            if current == self.s_start:
+
+        if self.cells[self.goal] or self.cells[self.start] or self.g[self.goal] == math.inf:
+            return []
+
+        path = [self.goal]
+        on_path = {self.goal}
+        s = self.goal
+
+        while s != self.start:
+            s_p = self.PARENT[s]
+
+            if s_p < 0 or s_p in on_path or self.is_collision(s_p, s):
+                path = self.repair_path(path, on_path)
                 break
-            for x in self.get_neighbor(current):
-                if x not in used and not self.is_collision(current, x) and x[0] >= 0 and x[0] < self.x and x[1] >= 0 and x[1] < self.y:
-                    agenda.append(x)
-                    used.add(x)
-                    parents[x] = current
-            agenda.sort(key = lambda x: self.g.get(x))
-        return parents
 
+            path.append(s_p)
+            on_path.add(s_p)
+            s = s_p
+
+        coords = self.space.coords
+        return [coords(s) for s in reversed(path)]
 
+    def repair_path(self, path, on_path):
+        """
+        A* back towards the start from the states of a path whose last
+        back-pointer is broken, stopping at the start or at the first state
+        whose PARENT chain is intact. The search leaves from the end of the
+        path first, but can branch off earlier when that end is a dead end.
+        PARENT is rewritten along the new segment.
+        :param path: states from the goal up to the broken pointer
+        :param on_path: states of path
+        :return: repaired path from the goal to the start, [] if there is none
+        """
+
+        cells, successors = self.cells, self.space.successors
+        w, (x_start, y_start) = self.x, self.s_start
+        dist, came_from = {}, {}
+        broken = set()
+        heap = []
+
+        for k, s in enumerate(path):
+            dist[s], came_from[s] = 0.0, s
+            heap.append((math.hypot(s % w - x_start, s // w - y_start), -k, s))
+        heapq.heapify(heap)
+
+        while heap:
+            f, k, q = heapq.heappop(heap)
+
+            if q not in on_path:
+                chain = self.intact_chain(q, on_path, broken)
+                if chain is not None:
+                    break
+
+            for d, c, corner_a, corner_b in successors(q):
+                s_n = q + d
+                if cells[s_n] or cells[q + corner_a] or cells[q + corner_b] or s_n in on_path:
+                    continue
+                if dist[q] + c < dist.get(s_n, math.inf):
+                    dist[s_n] = dist[q] + c
+                    came_from[s_n] = q
+                    heapq.heappush(heap, (dist[s_n] + math.hypot(s_n % w - x_start, s_n // w - y_start), k, s_n))
+        else:
+            return []
+
+        segment = [q]
+        while came_from[segment[-1]] not in on_path:
+            segment.append(came_from[segment[-1]])
+        s = came_from[segment[-1]]
+        segment.reverse()
+
+        # the chain may cross the new segment, cut out the loop if it does
+        position = {s_c: k for k, s_c in enumerate(segment)}
+        crossings = [(position[s_c], k) for k, s_c in enumerate(chain) if s_c in position]
+        if crossings:
+            j, k = min(crossings)
+            segment, chain = segment[:j + 1], chain[k + 1:]
+
+        for s_c, s_p in zip([s] + segment, segment):
+            self.PARENT[s_c] = s_p
+
+        return path[:path.index(s) + 1] + segment + chain
+
+    def intact_chain(self, s, on_path, broken):
+        """
+        :param s: state
+        :param on_path: states the chain may not pass through
+        :param broken: states already known to lead to a broken pointer
+        :return: states after s down to the start following PARENT, or
+                 None if a pointer on the way is broken
+        """
+
+        chain, seen = [], {s}
+        s_c = s
+
+        while s_c != self.start:
+            s_p = self.PARENT[s_c]
+
+            if s_p < 0 or s_p in seen or s_p in on_path or s_p in broken or self.is_collision(s_p, s_c):
+                broken.update(seen)
+                return None
+
+            chain.append(s_p)
+            seen.add(s_p)
+            s_c = s_p
+
+        return chain
+
+    def visited_coords(self):
+        """
+        :return: visited states of every iteration as coordinates
+        """
+
+        coords = self.space.coords
+        return [[coords(s) for s in visited_each] for visited_each in self.visited]
+    
     def h(self, s):
         """
         Calculate heuristic.
@@ -302,13 +606,21 @@ class LparaStar:
         :return: heuristic function value
         """
 
+        h = self.H[s]
+        if h >= 0:
+            return h
+
         heuristic_type = self.heuristic_type                                # heuristic type
         goal = self.s_goal                                                  # goal node
+        x, y = s % self.x, s // self.x
 
         if heuristic_type == "manhattan":
-            return abs(goal[0] - s[0]) + abs(goal[1] - s[1])
+            h = abs(goal[0] - x) + abs(goal[1] - y)
         else:
-            return math.hypot(goal[0] - s[0], goal[1] - s[1])
+            h = math.hypot(goal[0] - x, goal[1] - y)
+
+        self.H[s] = h
+        return h
 
     def cost(self, s_start, s_goal):
         """
@@ -322,7 +634,7 @@ class LparaStar:
         if self.is_collision(s_start, s_goal):
             return math.inf
 
-        return math.hypot(s_goal[0] - s_start[0], s_goal[1] - s_start[1])
+        return self.space.distance(s_start, s_goal)
 
     def is_collision(self, s_start, s_end):
         """
@@ -332,18 +644,16 @@ class LparaStar:
         :return: True: is collision / False: not collision
         """
 
-        if s_start in self.obs or s_end in self.obs:
+        cells, w = self.cells, self.x
+
+        if cells[s_start] or cells[s_end]:
             return True
 
-        if s_start[0] != s_end[0] and s_start[1] != s_end[1]:
-            if s_end[0] - s_start[0] == s_start[1] - s_end[1]:
-                s1 = (min(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-            else:
-                s1 = (min(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
+        x1, y1, x2, y2 = s_start % w, s_start // w, s_end % w, s_end // w
 
-            if s1 in self.obs or s2 in self.obs:
+        if x1 != x2 and y1 != y2:
+            # diagonal move: both cells at the corners it cuts must be free
+            if cells[y2 * w + x1] or cells[y1 * w + x2]:
                 return True
 
         return False
@@ -1,16 +1,18 @@
 import os
 import sys
-import math
 import random
 import json
-import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
                 "/../../Search_based_Planning/")
 
-from plotting import Plotting
-from env import Env
-import matplotlib.pyplot as plt
+import lpara_star_realtime
+import scenarios
+import instrumentation
+import history
+import results
 
 PARAMETERS = {
     "e": 2.5, 
@@ -19,60 +21,33 @@ PARAMETERS = {
     "clump-size": "medium",
     "coverage": 0.1,
     "percent-change": 0.1,
-    "plot": True
+    "plot": True,
+    "stats": None,
+    "history": "full"
 }
-class LparaStar:
-    def __init__(self, s_start, s_goal, e, heuristic_type, connected=8, size=50, coverage=0.1, clump_size='small', percent_change=0.1, plot=True):
-        self.s_start, self.s_goal = s_start, s_goal
-        self.heuristic_type = heuristic_type
-                                               # position of obstacles
-        self.e = e
-        self.new_env_changes = False
-        self.s_changed = set()
-        self.connected, self.size, self.coverage, self.clump_size, self.percent_change = connected, size, coverage, clump_size, percent_change
-
-        self.Plot = Plotting(self.s_start, self.s_goal, self.connected, self.size, self.coverage, self.clump_size) 
-        self.Env = self.Plot.env
-        self.x = self.Env.x_range
-        self.y = self.Env.y_range
-        self.u_set = self.Env.motions                                       # feasible input set
-        self.obs = self.Env.obs   
-        self.fig = plt.figure()
+class LparaStar(lpara_star_realtime.LparaStar):
+    """
+    Automated LPARA*: instead of user clicks, obstacles are changed by
+    percent_change after every call to ImprovePath().
+    """
+
+    def __init__(self, s_start, s_goal, e, heuristic_type, connected=8, size=50, coverage=0.1, clump_size='small', percent_change=0.1, plot=True, schedule=None, scenario=None, history=None):
+        if scenario is None:
+            super().__init__(s_start, s_goal, e, heuristic_type, connected, size, coverage, clump_size, schedule,
+                             plot=plot, history=history)
+            self.rng = random                                               # source of the random changes
+        else:
+            super().__init__(s_start, s_goal, e, heuristic_type, connected, size, coverage, clump_size, schedule,
+                             scenario.map_rng, scenario.obs, plot, history)
+            if scenario.obs is None:
+                scenario.record_obs(self.cells)
+            self.rng = scenario.change_rng
+        self.scenario = scenario                                            # recorded or replayed changes, None = unseeded
+        self.round = 0
+        self.percent_change = percent_change
         self.obs_list = []  
         self.clump_dict = {'small': 1, 'medium': 4, 'large': 9} 
         self.total_obstacles = int(self.coverage * self.x * self.y / self.clump_dict[clump_size])  
-        self.num_expanded = 0  
-        self.plot = plot                                                                                           # weight
-
-        self.colors_visited = Plotting.colors_visited()
-        self.colors_path = Plotting.colors_path()
-        self.g = dict()                                                     # Cost to come
-        self.OPEN = dict()                                                  # priority queue / OPEN set
-        self.CLOSED = set()                                                 # CLOSED set
-        self.INCONS = {}                                                    # INCONSISTENT set
-        self.PARENT = dict()                                                # relations
-        self.path = []                                                      # planning path
-        self.visited = []                                                   # order of visited nodes
-
-    def init(self):
-        """
-        initialize each set.
-        """
-
-        for i in range(self.Env.x_range):
-            for j in range(self.Env.y_range):
-                self.g[(i, j)] = math.inf
-
-        self.g[self.s_start] = 0.0
-        self.OPEN[self.s_start] = self.f_value(self.s_start)
-        self.PARENT[self.s_start] = self.s_start
-
-    def plot_progress(self):
-        k = len(self.visited) - 1
-        self.Plot.plot_visited(self.visited[k], self.colors_visited[k % len(self.colors_visited)])
-        self.Plot.plot_path(self.path[k], self.colors_path[k % len(self.colors_path)], True)
-        # self.Plot.plot_obs()
-        plt.pause(0.5) # TODO: increase delay to increase time for user updates
 
     def change_obs(self, x, y):
         if x < 0 or x > self.x - 1 or y < 0 or y > self.y - 1:
@@ -87,311 +62,76 @@ class LparaStar:
             # TODO: make sure that obstacles are reflecting in determined paths
             for (i, j) in self.get_clump(x, y):
                 self.obs.add((i, j))
-                self.s_changed.add((i, j))
-                if self.plot:
-                    plt.plot(i, j, "sk")
+                self.s_changed.add(self.space.index((i, j)))
         else:
             for (i, j) in self.get_clump(x, y):
                 if (i, j) in self.obs:
                     self.obs.remove((i, j))
-                    self.s_changed.add((i, j))
-                if self.plot:
-                    plt.plot(i, j, "sw")
-
-        self.Plot.update_obs(self.obs)
+                    self.s_changed.add(self.space.index((i, j)))
 
-    def get_clump(self, x, y):
-        clump_dict = {'small': 0, 'medium': 1, 'large': 2}
-        delta = clump_dict[self.clump_size]
-        for i in range(x - delta, x + delta + 1):
-            for j in range(y - delta, y + delta + 1):
-                if i >= 0 and i < self.x and j >= 0 and j < self.y:
-                    yield (i, j)
+        if self.plot:
+            self.Plot.update_obs(self.obs)
 
     def change_all_obs(self, percent_change):
+        replay = self.next_round()
+        removed, added = replay or (set(), [])
         new_obs_list = []
         for (j, obs) in enumerate(self.obs_list):
-            if random.random() < percent_change:
+            if (j in removed) if replay else (self.rng.random() < percent_change):
+                removed.add(j)
                 self.change_obs(obs[0], obs[1])
             else:
                 new_obs_list.append(obs)
         obs_to_add = self.total_obstacles - len(self.obs_list)
         self.obs_list = new_obs_list
-        for i in range(int(obs_to_add)):
-            x = random.randint(self.s_start[0] + 1, self.s_goal[0] - 1)
-            y = random.randint(self.s_start[1] + 1, self.s_goal[1] - 1)
+        if not replay:
+            for i in range(int(obs_to_add)):
+                x = self.rng.randint(self.s_start[0] + 1, self.s_goal[0] - 1)
+                y = self.rng.randint(self.s_start[1] + 1, self.s_goal[1] - 1)
+                added.append((x, y))
+            if self.scenario is not None:
+                self.scenario.record_changes(removed, added)
+        for (x, y) in added:
             self.change_obs(x, y)
 
+    def next_round(self):
+        """
+        :return: the clumps removed (indices into obs_list) and added
+                 ((x, y) centres) in this round if the scenario has it
+                 recorded, None if it has to be drawn
+        """
+        k, self.round = self.round, self.round + 1
+        if self.scenario is not None and k < len(self.scenario.changes):
+            return self.scenario.replay_changes(k)
+        return None
 
-    def searching(self):
+    def searching(self, deadline=None):
+        self.deadline = deadline
         self.init()
+        self.schedule.reset()
         # self.fig.canvas.mpl_connect('button_press_event', self.on_press)
         if self.plot:
             self.Plot.plot_grid("LPARA*")
         self.ImprovePath()
-        self.path.append(self.extract_path())
+        self.publish_path()
         if self.plot:
             self.plot_progress()
 
-        while self.e > 1:  
+        while self.e > 1 and not self.expired():
         # for i in range(3):      
             # print(self.num_expanded)                                  # continue condition
-            self.e -= 0.1 # TODO: interesting to experiment with changing this value                                               # increase weight
-            self.OPEN.update(self.INCONS)
-            self.OPEN = {s: self.f_value(s) for s in self.OPEN}             # update f_value of OPEN set
+            self.decrease_e()                                               # increase weight
+            self.OPEN.reprioritise(self.g, self.H, self.e, self.INCONS, self.rhs)   # move INCONS to OPEN, update f_value
 
             self.INCONS = dict()
             self.CLOSED = set()
             self.change_all_obs(self.percent_change)
             self.ImprovePath()                                    
-            self.path.append(self.extract_path())
+            self.publish_path()
             if self.plot:
                 self.plot_progress()
 
-        return self.path, self.visited, self.num_expanded
-
-    def UpdateVertex(self, s):
-        """
-        update the status and the current cost to come of state s.
-        :param s: state s
-        """
-        if s in self.OPEN:
-            self.OPEN.pop(s)
-        if s in self.obs:
-            self.g[s] = math.inf
-            return
-        
-        if s != self.s_start:
-
-            # Condition: cost of parent of s changed
-            # Since we do not record the children of a state, we need to enumerate its neighbors
-            rhs = min(self.g[s_n] + self.cost(s_n, s)
-                              for s_n in self.get_neighbor(s))
-        else:
-            rhs = 0
-
-        if self.g[s] != rhs:
-
-            # Condition: current cost to come is different to that of last time
-            # state s should be added into OPEN set 
-            self.OPEN[s] = self.f_value(s)
-
-    def ImprovePath(self):
-        """
-        :return: a e'-suboptimal path
-        """
-        visited_each = []
-
-        while True and len(self.OPEN) != 0:
-            if self.new_env_changes:
-                # print("NEW ENV CHANGES")
-                # TODO: MAKE EDGES CONSISTENT HERE BY CALLING LPA* ALGO
-                # Modify previously calculated path to avoid it?? 
-                for s in self.s_changed:
-                    self.UpdateVertex(s)
-                    self.num_expanded += 1
-                
-                    for s_n in self.get_neighbor(s):
-                        self.UpdateVertex(s_n)
-                        self.num_expanded += 1
-
-                self.s_changed = set()
-                self.new_env_changes = False
-
-            s, f_small = self.calc_smallest_f()
-
-            if self.f_value(self.s_goal) <= f_small:
-                # print("break")
-                break
-            # if self.CalculateKey(self.s_goal) <= self.CalculateKey(s):
-            #     print("break")
-            #     break
-
-
-            self.OPEN.pop(s)
-            self.CLOSED.add(s)
-            if s in self.obs:
-                continue
-
-            for s_n in self.get_neighbor(s):
-                if s_n in self.obs:
-                    continue
-
-                new_cost = self.g[s] + self.cost(s, s_n)
-
-                if s_n not in self.g or new_cost < self.g[s_n]:
-                    self.g[s_n] = new_cost
-                    self.PARENT[s_n] = s
-                    visited_each.append(s_n)
-                    self.num_expanded += 1
-
-                    if s_n not in self.CLOSED:
-                        self.OPEN[s_n] = self.f_value(s_n)
-                    else:
-                        self.INCONS[s_n] = 0.0
-
-        self.visited.append(visited_each)
-
-    def calc_smallest_f(self):
-        """
-        :return: node with smallest f_value in OPEN set.
-        """
-
-        s_small = min(self.OPEN, key=self.OPEN.get)
-
-        return s_small, self.OPEN[s_small]
-
-    def get_neighbor(self, s):
-        """
-        find neighbors of state s that not in obstacles.
-        :param s: state
-        :return: neighbors
-        """
-
-        return {(s[0] + u[0], s[1] + u[1]) for u in self.u_set if 0 <= s[0] + u[0] < self.x and 0 <= s[1] + u[1] < self.y}
-
-    def update_e(self):
-        v = float("inf")
-
-        if self.OPEN:
-            v = min(self.g[s] + self.h(s) for s in self.OPEN)
-        if self.INCONS:
-            v = min(v, min(self.g[s] + self.h(s) for s in self.INCONS))
-
-        return min(self.e, self.g[self.s_goal] / v)
-
-    def f_value(self, x):
-        """
-        f = g + e * h
-        f = cost-to-come + weight * cost-to-go
-        :param x: current state
-        :return: f_value
-        """
-
-        return self.g[x] + self.e * self.h(x)
-
-    def CalculateKey(self, s):
-        return [min(self.g[s], self.rhs(s)) + self.h(s),
-                min(self.g[s], self.rhs(s))]
-    
-    def rhs(self, s):
-        return min(self.g[s_n] + self.cost(s_n, s)
-                for s_n in self.get_neighbor(s))
-
-    def extract_path(self):
-        """
-        Extract the path based on the PARENT set.
-        :return: The planning path
-        """
-        
-        parents = self.extract_path_no_recurse()
-        path = []
-        current = self.s_start
-        while current is not None:
-            path.append(current)
-            current = parents[current]
-        return path
-    
-    def extract_path_better(self, goal, current_path, used, start):
-        # go backwards in path but keep track of ties
-        # when there are multiple options, try both paths
-        # at the end, choose the path that ends with s_start
-        g_list = {}
-        for x in self.get_neighbor(goal):
-            if x not in used and x[0] >= 0 and x[0] < self.x and x[1] >= 0 and x[1] < self.y:
-                g_list[x] = self.g[x]
-        if len(g_list) > 0 and len(current_path) < 100:
-            possible_s = []
-            min_val = g_list[min(g_list, key=g_list.get)]
-            if min_val == math.inf:
-                return [current_path]
-            for s in g_list:
-                if g_list[s] == min_val:
-                    possible_s.append(s)
-            if min_val == 0:
-                return [current_path + [end] for end in possible_s]
-            paths = []
-            for possible in possible_s:
-                for path in self.extract_path_better(possible, current_path + [possible], used | set([possible]), start):
-                    paths.append(path)
-                    if path[-1] == start:
-                        return paths
-            return paths       
-        else:
-            return [current_path]
-        
-    def extract_path_no_recurse(self):
-        # go backwards in path but keep track of ties
-        # when there are multiple options, try both paths
-        # at the end, choose the path that ends with s_start
-        parents = {self.s_goal: None}
-        agenda = [self.s_goal]
-        used = {self.s_goal}
-        while agenda:
-            current = agenda.pop(0)
-            if current == self.s_start:
-                break
-            for x in self.get_neighbor(current):
-                if x not in used and not self.is_collision(current, x) and x[0] >= 0 and x[0] < self.x and x[1] >= 0 and x[1] < self.y:
-                    agenda.append(x)
-                    used.add(x)
-                    parents[x] = current
-            agenda.sort(key = lambda x: self.g.get(x))
-        return parents
-
-
-    def h(self, s):
-        """
-        Calculate heuristic.
-        :param s: current node (state)
-        :return: heuristic function value
-        """
-
-        heuristic_type = self.heuristic_type                                # heuristic type
-        goal = self.s_goal                                                  # goal node
-
-        if heuristic_type == "manhattan":
-            return abs(goal[0] - s[0]) + abs(goal[1] - s[1])
-        else:
-            return math.hypot(goal[0] - s[0], goal[1] - s[1])
-
-    def cost(self, s_start, s_goal):
-        """
-        Calculate Cost for this motion
-        :param s_start: starting node
-        :param s_goal: end node
-        :return:  Cost for this motion
-        :note: Cost function could be more complicate!
-        """
-
-        if self.is_collision(s_start, s_goal):
-            return math.inf
-
-        return math.hypot(s_goal[0] - s_start[0], s_goal[1] - s_start[1])
-
-    def is_collision(self, s_start, s_end):
-        """
-        check if the line segment (s_start, s_end) is collision.
-        :param s_start: start node
-        :param s_end: end node
-        :return: True: is collision / False: not collision
-        """
-
-        if s_start in self.obs or s_end in self.obs:
-            return True
-
-        if s_start[0] != s_end[0] and s_start[1] != s_end[1]:
-            if s_end[0] - s_start[0] == s_start[1] - s_end[1]:
-                s1 = (min(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-            else:
-                s1 = (min(s_start[0], s_end[0]), max(s_start[1], s_end[1]))
-                s2 = (max(s_start[0], s_end[0]), min(s_start[1], s_end[1]))
-
-            if s1 in self.obs or s2 in self.obs:
-                return True
-
-        return False
+        return self.path, self.visited_coords(), self.num_expanded
 
 # TODO: raise exception if invalid input
 def parse_arguments():
@@ -416,14 +156,28 @@ def parse_arguments():
     if "-plot" in sys.argv:
         i = sys.argv.index("-plot")
         PARAMETERS["plot"] = eval(sys.argv[i + 1])
-
-def validate(epsilon, connected, size, clump_size, coverage, percent_change, num_rounds=1000):
+    if "-stats" in sys.argv:
+        i = sys.argv.index("-stats")
+        PARAMETERS["stats"] = sys.argv[i + 1]
+    if "-history" in sys.argv:
+        i = sys.argv.index("-history")
+        PARAMETERS["history"] = sys.argv[i + 1]
+
+def run_rounds(planner, epsilon, connected, size, clump_size, coverage, percent_change, num_rounds=1000, seed=None, cache=None):
+    """
+    :param planner: LparaStar class under test
+    :param seed: round i runs on the scenario seeded with seed + i, None = unseeded worlds
+    :param cache: scenario cache directory, None = do not cache
+    :return: one record per round with its expansions, or the error it failed with
+    """
     s_start = (5, 5)
     s_goal = (size - 5, size - 5)
-    successes = num_rounds
-    avg_expansion = 0
+    rounds = []
     for i in range(num_rounds):
-        lparastar = LparaStar(
+        scenario = None
+        if seed is not None:
+            scenario = scenarios.load(size, coverage, clump_size, percent_change, seed + i, cache)
+        lparastar = planner(
             s_start, 
             s_goal, 
             epsilon, 
@@ -433,37 +187,87 @@ def validate(epsilon, connected, size, clump_size, coverage, percent_change, num
             clump_size = clump_size,
             coverage = coverage,
             percent_change = percent_change,
-            plot = False
+            plot = False,
+            scenario = scenario,
+            history = history.CountHistory()                                # only the expansion counts are used
         )
+        record = {'record': 'round', 'round': i, 'scenario_seed': None if seed is None else seed + i}
         try: 
             path, visited, num_expanded = lparastar.searching()
-            avg_expansion += num_expanded
-        except: 
-            successes -= 1
-    return avg_expansion / successes
-
-def validate_all():
+            record['num_expanded'] = num_expanded
+        except Exception as e:
+            record['error'] = '%s: %s' % (type(e).__name__, e)
+        if scenario is not None and cache is not None:
+            try:
+                scenario.save(cache)
+            except OSError as e:                                            # the round stands, only its scenario is not cached
+                record['cache_error'] = '%s: %s' % (type(e).__name__, e)
+        rounds.append(record)
+    return rounds
+
+def validate(epsilon, connected, size, clump_size, coverage, percent_change, num_rounds=1000, seed=None, cache=None):
+    """
+    :return: average number of states expanded over the rounds that did not fail
+    """
+    rounds = run_rounds(LparaStar, epsilon, connected, size, clump_size, coverage, percent_change, num_rounds, seed, cache)
+    config = (connected, size, clump_size, coverage, percent_change)
+    return results.summary(config, seed, num_rounds, rounds)['avg_states_expanded']
+
+def sweep_configs():
     connecteds = [4, 8]
     sizes = [30, 50, 100]
     clump_sizes = ['small', 'medium', 'large']
     coverages = [0.05, 0.1, 0.2]
     percent_changes = [0.05, 0.1, 0.2] 
-    validation_stats = [] 
-    for connected in connecteds:
-        for size in sizes:
-            for clump_size in clump_sizes:
-                for coverage in coverages:
-                    for percent_change in percent_changes:
-                        validation = validate(2.5, connected, size, clump_size, coverage, percent_change, 100)
-                        print(validation)
-                        validation_stats.append({'connected': connected, 
-                                                 'size': size, 
-                                                 'clump_size': clump_size, 
-                                                 'coverage': coverage,
-                                                 'percent_change': percent_change,
-                                                 'avg_states_expanded': validation})
-    print(validation_stats)
-    json.dump(validation_stats, open('data/validation_stats.json', 'w'))
+    return list(itertools.product(connecteds, sizes, clump_sizes, coverages, percent_changes))
+
+def validate_all(workers=None, seed=0, num_rounds=100, planner=LparaStar, file='data/validation_stats.json', cache='data/scenarios', log=None):
+    """
+    run every configuration of the sweep in a process pool.
+    Every configuration runs on seeded scenarios, so the results do not
+    depend on the number of workers. Sweeps with the same seed (e.g. LPA*
+    and LPARA*) see the same worlds. Each round and each configuration is
+    appended to the log as soon as it finishes; configurations already in
+    the log for this seed and number of rounds are skipped, so an
+    interrupted sweep resumes where it stopped. The summaries are written
+    to file in configuration order once all configurations are done.
+    :param workers: number of processes, None = one per CPU
+    :param seed: base seed of the sweep
+    :param num_rounds: rounds per configuration
+    :param planner: LparaStar class under test
+    :param file: where to write the results
+    :param cache: scenario cache directory, None = regenerate every scenario
+    :param log: JSON-lines log, None = file with the extension .jsonl
+    """
+    configs = sweep_configs()
+    sink = results.JsonlSink(log or os.path.splitext(file)[0] + '.jsonl')
+    todo = [config for config in configs if config + (seed, num_rounds) not in sink.done]
+    print(len(configs) - len(todo), 'configurations already done')
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_rounds, planner, 2.5, *config, num_rounds, seed, cache): config for config in todo}
+        for future in as_completed(futures):
+            config = futures[future]
+            info = dict(zip(results.CONFIG, config), seed=seed, num_rounds=num_rounds)
+            try:
+                rounds = future.result()
+            except Exception as e:
+                sink.write(dict(info, record='config_error', error='%s: %s' % (type(e).__name__, e)))
+                print(config, 'failed:', e)
+                continue
+            summary = results.summary(config, seed, num_rounds, rounds)
+            sink.write(*[dict(info, **record) for record in rounds], summary)
+            print(config, summary['avg_states_expanded'], summary['failures'], 'failed rounds')
+    sink.close()
+
+    missing = [config for config in configs if config + (seed, num_rounds) not in sink.done]
+    if missing:
+        print(len(missing), 'configurations failed, rerun to retry them')
+        return
+    validation_stats = []
+    for config in configs:
+        summary = sink.done[config + (seed, num_rounds)]
+        validation_stats.append({name: summary[name] for name in results.CONFIG + ('avg_states_expanded',)})
+    json.dump(validation_stats, open(file, 'w'))
 
 def main():
     s_start = (5, 5)
@@ -480,13 +284,19 @@ def main():
         clump_size = PARAMETERS["clump-size"],
         coverage = PARAMETERS["coverage"],
         percent_change = PARAMETERS["percent-change"],
-        plot = PARAMETERS["plot"]
+        plot = PARAMETERS["plot"],
+        history = history.policy(PARAMETERS["history"])
     )
 
+    if PARAMETERS["stats"]:
+        instrumentation.attach(lparastar2)
+
     path, visited, num_expanded = lparastar2.searching()
 
     print("Arguments: ", sys.argv)
     print("number of states expanded: " + str(num_expanded))
+    if PARAMETERS["stats"]:
+        lparastar2.stats.dump(PARAMETERS["stats"])
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,6 +1,5 @@
 import os
 import sys
-import matplotlib.pyplot as plt
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
                 "/../../Search_based_Planning/")
@@ -9,14 +8,40 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
 import env
 
 
+class LazyPyplot:
+    """
+    Stands in for matplotlib.pyplot and imports it on first use, so the
+    planners can run headless without loading matplotlib at all.
+    """
+
+    def __getattr__(self, name):
+        import matplotlib.pyplot
+
+        return getattr(matplotlib.pyplot, name)
+
+
+plt = LazyPyplot()
+
+FREE, OBSTACLE = 0, 1                                                       # fixed colour codes of the grid image
+
+
 class Plotting:
-    def __init__(self, xI, xG, connected=8, size=50, coverage=0.1, clump_size='small'):
+    def __init__(self, xI, xG, connected=8, size=50, coverage=0.1, clump_size='small', rng=None, obs=None, environment=None):
         self.xI, self.xG = xI, xG
-        self.env = env.Env(xI, xG, connected, size, coverage, clump_size)
+        if environment is None:
+            environment = env.Env(xI, xG, connected, size, coverage, clump_size, rng=rng, obs=obs)
+        self.env = environment
         self.obs = self.env.obs
 
+        self.palette = ['white', 'black']                                   # colour of each code, FREE and OBSTACLE first
+        self.codes = None                                                   # colour code per cell, indexed [y, x]
+        self.image = None                                                   # the single image artist showing codes
+        self.background = None                                              # figure without the image, for blitting
+
     def update_obs(self, obs):
         self.obs = obs
+        if self.image is not None:
+            self.plot_obs()
 
     def animation(self, path, visited, name):
         self.plot_grid(name)
@@ -60,65 +85,127 @@ class Plotting:
         plt.show()
 
     def plot_grid(self, name):
-        obs_x = [x[0] for x in self.obs]
-        obs_y = [x[1] for x in self.obs]
+        """
+        draw the grid as a single image. Obstacles, visited cells, paths and
+        the start and goal are layers of one array of colour codes, so
+        later updates only rewrite cells and blit the image again.
+        """
+
+        import numpy as np
+
+        if self.codes is None:
+            self.codes = np.zeros((self.env.y_range, self.env.x_range), dtype=np.uint8)
+
+        self.codes[:] = FREE
+        self.codes[self.obs_mask()] = OBSTACLE
+        self.mark_ends()
+
+        if self.image is None:
+            from matplotlib.colors import ListedColormap
+
+            x, y = self.env.x_range, self.env.y_range
+            self.image = plt.imshow(self.codes, origin="lower", interpolation="nearest",
+                                    cmap=ListedColormap(self.palette), vmin=-0.5, vmax=len(self.palette) - 0.5,
+                                    extent=(-0.5, x - 0.5, -0.5, y - 0.5))
+            canvas = self.image.figure.canvas
+            self.image.set_animated(canvas.supports_blit)
+            canvas.mpl_connect('draw_event', self.on_draw)
 
-        plt.plot(self.xI[0], self.xI[1], "bs")
-        plt.plot(self.xG[0], self.xG[1], "gs")
-        plt.plot(obs_x, obs_y, "sk")
         plt.title(name)
         plt.axis("equal")
+        self.blit()
 
     def plot_obs(self):
-        obs_x = [x[0] for x in self.obs]
-        obs_y = [x[1] for x in self.obs]
-        plt.plot(obs_x, obs_y, "sk")
+        self.codes[self.codes == OBSTACLE] = FREE
+        self.codes[self.obs_mask()] = OBSTACLE
+        self.blit()
 
     def plot_visited(self, visited, cl='gray'):
-        if self.xI in visited:
-            visited.remove(self.xI)
-
-        if self.xG in visited:
-            visited.remove(self.xG)
-
-        count = 0
-
-        for x in visited:
-            # print(x)
-            if x in self.obs:
-                # print("skipping an obstacle in visited")
-                continue
-            count += 1
-            plt.plot(x[0], x[1], color=cl, marker='s')
-            plt.gcf().canvas.mpl_connect('key_release_event',
-                                         lambda event: [exit(0) if event.key == 'escape' else None])
-
-            if count < len(visited) / 3:
-                length = 20
-            elif count < len(visited) * 2 / 3:
-                length = 30
-            else:
-                length = 40
-            #
-            # length = 15
-
-            if count % length == 0:
-                plt.pause(0.001)
-        plt.pause(0.01)
+        self.mark(visited, cl)
+        self.mark_ends()
+        self.blit()
 
     def plot_path(self, path, cl='r', flag=False):
-        path_x = [path[i][0] for i in range(len(path))]
-        path_y = [path[i][1] for i in range(len(path))]
+        self.mark(path, cl if flag else 'r')
+        self.mark_ends()
+        self.blit()
 
-        if not flag:
-            plt.plot(path_x, path_y, linewidth='3', color='r')
-        else:
-            plt.plot(path_x, path_y, linewidth='3', color=cl)
+    def obs_mask(self):
+        """
+        :return: boolean array of the obstacle cells, indexed [y, x]
+        """
+
+        if isinstance(self.obs, env.OccupancyGrid):
+            return self.obs.as_array().astype(bool)
+
+        return env.OccupancyGrid(self.env.x_range, self.env.y_range, self.obs).as_array().astype(bool)
 
-        plt.plot(self.xI[0], self.xI[1], "bs")
-        plt.plot(self.xG[0], self.xG[1], "gs")
+    def code(self, cl):
+        """
+        :return: colour code of cl, added to the palette on first use
+        """
+
+        if cl not in self.palette:
+            self.palette.append(cl)
+            if self.image is not None:
+                from matplotlib.colors import ListedColormap
+
+                self.image.set_cmap(ListedColormap(self.palette))
+                self.image.set_clim(-0.5, len(self.palette) - 0.5)
+
+        return self.palette.index(cl)
+
+    def mark(self, cells, cl):
+        """
+        colour free cells.
+        :param cells: (x, y) coordinates
+        """
+
+        import numpy as np
+
+        if not len(cells):
+            return
+
+        xs, ys = np.array(cells, dtype=np.intp).T
+        free = self.codes[ys, xs] != OBSTACLE
+        self.codes[ys[free], xs[free]] = self.code(cl)
+
+    def mark_ends(self):
+        self.codes[self.xI[1], self.xI[0]] = self.code('b')
+        self.codes[self.xG[1], self.xG[0]] = self.code('g')
+
+    def on_draw(self, event):
+        """
+        after a full redraw, keep the figure without the image as the
+        background to blit onto and put the image back.
+        """
+
+        canvas, axes = self.image.figure.canvas, self.image.axes
+        if self.image.get_animated():
+            self.background = canvas.copy_from_bbox(axes.bbox)
+            axes.draw_artist(self.image)
+
+    def blit(self):
+        """
+        show the current codes: redraw only the image, or request a normal
+        redraw if the backend cannot blit.
+        """
+
+        image = self.image
+        if image is None:
+            return
+
+        image.set_data(self.codes)
+        canvas = image.figure.canvas
+
+        if self.background is None or not image.get_animated():
+            canvas.draw_idle()
+        else:
+            canvas.restore_region(self.background)
+            image.axes.draw_artist(image)
+            canvas.blit(image.axes.bbox)
 
-        plt.pause(0.01)
+        canvas.flush_events()
 
     @staticmethod
     def color_list():
@@ -0,0 +1,261 @@
+import heapq
+import itertools
+
+
+class PriorityQueue:
+    """
+    OPEN set backed by a binary heap with lazy invalidation.
+
+    Supports the same operations the planners used on their OPEN dict
+    (s in OPEN, OPEN[s] = f, OPEN.pop(s), OPEN.update(...), iteration),
+    but the state with the smallest priority is found in O(log n).
+    Ties are broken by insertion order, exactly as min(OPEN, key=OPEN.get)
+    does on a dict, so search results are unchanged.
+    """
+
+    def __init__(self, items=()):
+        self.heap = []                                                      # [priority, order, state]
+        self.entries = {}                                                   # state -> live heap entry
+        self.counter = itertools.count()
+
+        for s, priority in dict(items).items():
+            self[s] = priority
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, s):
+        return s in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, s):
+        return self.entries[s][0]
+
+    def __setitem__(self, s, priority):
+        entry = self.entries.get(s)
+
+        if entry is None:
+            entry = [priority, next(self.counter), s]
+        else:
+            # keep the insertion order of s, the old entry goes stale
+            entry = [priority, entry[1], s]
+
+        self.entries[s] = entry
+        heapq.heappush(self.heap, entry)
+
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.compact()
+
+    def get(self, s, default=None):
+        entry = self.entries.get(s)
+
+        return default if entry is None else entry[0]
+
+    def pop(self, s, *default):
+        """
+        remove state s, its heap entry is discarded lazily.
+        :param s: state
+        :return: priority of s
+        """
+
+        if s not in self.entries and default:
+            return default[0]
+
+        return self.entries.pop(s)[0]
+
+    def update(self, other):
+        """
+        set the priorities of a batch of states. A large batch is merged
+        with one heapify instead of a push per state.
+        :param other: mapping or pairs of state and priority
+        """
+
+        other = dict(other)
+
+        if len(other) * 4 < len(self.heap):
+            for s, priority in other.items():
+                self[s] = priority
+            return
+
+        entries, counter = self.entries, self.counter
+
+        for s, priority in other.items():
+            entry = entries.get(s)
+            entries[s] = [priority, next(counter) if entry is None else entry[1], s]
+
+        self.compact()
+
+    def top(self):
+        """
+        :return: state with smallest priority and its priority.
+        """
+
+        heap, entries = self.heap, self.entries
+
+        while heap:
+            entry = heap[0]
+            if entries.get(entry[2]) is entry:
+                return entry[2], entry[0]
+            heapq.heappop(heap)
+
+        raise IndexError("top of an empty priority queue")
+
+    def reprioritise(self, g, h, e, incons=(), rhs=None):
+        """
+        merge incons into the queue, set every priority to g[s] + e * h[s]
+        (to the key of LparaStar.f_value if rhs is given) and rebuild
+        the heap with a single heapify. g, rhs and h are arrays of cached values, so
+        this is one linear pass without per-state calls.
+        :param g: cost-to-come per state
+        :param h: cached heuristic per state
+        :param e: heuristic weight
+        :param incons: states to add to the queue
+        :param rhs: one-step lookahead of g per state, None = g only
+        """
+
+        entries, counter = self.entries, self.counter
+
+        for s in incons:
+            if s not in entries:
+                entries[s] = [0.0, next(counter), s]
+
+        if rhs is None:
+            for s, entry in entries.items():
+                entry[0] = g[s] + e * h[s]
+        else:
+            for s, entry in entries.items():
+                g_s, rhs_s = g[s], rhs[s]
+                if g_s < rhs_s:
+                    entry[0] = round(g_s + h[s], 9), 0
+                else:
+                    entry[0] = round(rhs_s + e * h[s], 9), 1
+
+        self.heap = list(entries.values())
+        heapq.heapify(self.heap)
+
+    def compact(self):
+        """
+        drop stale entries left behind by pop and priority changes.
+        """
+
+        self.heap = list(self.entries.values())
+        heapq.heapify(self.heap)
+
+
+class IndexedPriorityQueue:
+    """
+    Indexed binary heap (heap + position map) for LPA*'s U set.
+
+    Keys are tuples compared lexicographically. Insert, key update, removal
+    and top are all O(log n) or better. Setting the key of a queued state
+    counts as re-inserting it, so ties are broken by the time of the last
+    update, exactly as the pop/reinsert on a dict did before.
+    """
+
+    def __init__(self):
+        self.heap = []                                                      # [key, order, state]
+        self.pos = {}                                                       # state -> index in heap
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, s):
+        return s in self.pos
+
+    def __iter__(self):
+        return iter(self.pos)
+
+    def __getitem__(self, s):
+        return self.heap[self.pos[s]][0]
+
+    def __setitem__(self, s, key):
+        i = self.pos.get(s)
+
+        if i is None:
+            i = len(self.heap)
+            self.heap.append([key, next(self.counter), s])
+            self.pos[s] = i
+            self.sift_up(i)
+            return
+
+        entry = self.heap[i]
+        entry[0], entry[1] = key, next(self.counter)
+        self.sift_up(i)
+        self.sift_down(self.pos[s])
+
+    def pop(self, s, *default):
+        """
+        remove state s from the queue.
+        :param s: state
+        :return: key of s
+        """
+
+        i = self.pos.get(s)
+
+        if i is None:
+            if default:
+                return default[0]
+            raise KeyError(s)
+
+        heap = self.heap
+        key = heap[i][0]
+        last = heap.pop()
+        del self.pos[s]
+
+        if i < len(heap):
+            heap[i] = last
+            self.pos[last[2]] = i
+            self.sift_up(i)
+            self.sift_down(self.pos[last[2]])
+
+        return key
+
+    def top(self):
+        """
+        :return: state with the smallest key and its key.
+        """
+
+        if not self.heap:
+            raise IndexError("top of an empty priority queue")
+
+        entry = self.heap[0]
+
+        return entry[2], entry[0]
+
+    def sift_up(self, i):
+        heap, pos = self.heap, self.pos
+        entry = heap[i]
+
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[i] = heap[parent]
+            pos[heap[i][2]] = i
+            i = parent
+
+        heap[i] = entry
+        pos[entry[2]] = i
+
+    def sift_down(self, i):
+        heap, pos = self.heap, self.pos
+        n = len(heap)
+        entry = heap[i]
+
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[i] = heap[child]
+            pos[heap[i][2]] = i
+            i = child
+
+        heap[i] = entry
+        pos[entry[2]] = i
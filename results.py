@@ -0,0 +1,95 @@
+"""
+Append-only JSON-lines log of validation results.
+
+Every finished configuration of a sweep is appended as one block: a JSON
+object per round on its own line, then the configuration summary, written
+and flushed together, so a crash loses at most the configurations still
+running. Reopening the log cuts off a block left incomplete by a crash
+and reads back the configurations already finished so that a sweep can
+skip them.
+"""
+import os
+import json
+
+CONFIG = ("connected", "size", "clump_size", "coverage", "percent_change")
+
+
+class JsonlSink:
+    """
+    Records are dicts with a "record" field: "round" for one validation
+    round (num_expanded, or the error it failed with), "config" for the
+    summary of a finished configuration and "config_error" for a
+    configuration whose worker failed as a whole.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.done = {}                                                      # key() -> config record
+        if os.path.exists(file):
+            self.load()
+        else:
+            os.makedirs(os.path.dirname(file) or ".", exist_ok=True)
+        self.f = open(file, "a")
+
+    def load(self):
+        """
+        read back the finished configurations, dropping the rounds after
+        the last configuration record, which a crash cut short.
+        """
+
+        with open(self.file, "rb") as f:
+            data = f.read()
+
+        end = position = 0
+        for line in data.splitlines(keepends=True):
+            position += len(line)
+            if not line.endswith(b"\n"):
+                break
+            record = json.loads(line)
+            if record["record"] == "config":
+                self.done[key(record)] = record
+            if record["record"] != "round":
+                end = position
+
+        if end < len(data):
+            with open(self.file, "r+b") as f:
+                f.truncate(end)
+
+    def write(self, *records):
+        """
+        append records as one block and flush it; the rounds of a
+        configuration go in the same block as its config record.
+        """
+
+        self.f.write("".join(json.dumps(record) + "\n" for record in records))
+        self.f.flush()
+        for record in records:
+            if record["record"] == "config":
+                self.done[key(record)] = record
+
+    def close(self):
+        self.f.close()
+
+
+def key(record):
+    """
+    :return: the configuration, seed and number of rounds of a record
+    """
+
+    return tuple(record[name] for name in CONFIG) + (record["seed"], record["num_rounds"])
+
+
+def summary(config, seed, num_rounds, rounds):
+    """
+    :param config: (connected, size, clump_size, coverage, percent_change)
+    :param rounds: round records of the configuration
+    :return: the config record: average expansions over the rounds that succeeded
+    """
+
+    expanded = [r["num_expanded"] for r in rounds if "error" not in r]
+    record = dict(zip(CONFIG, config), record="config", seed=seed, num_rounds=num_rounds)
+    record["successes"] = len(expanded)
+    record["failures"] = len(rounds) - len(expanded)
+    record["avg_states_expanded"] = sum(expanded) / len(expanded) if expanded else None
+
+    return record
@@ -0,0 +1,256 @@
+"""
+Columnar store of validation results, keyed by configuration, algorithm and seed.
+
+Every row is one result: a round of a JSON-lines log (results.JsonlSink),
+keyed by its scenario seed, or a configuration average of a summary JSON
+file, with seed -1. Columns are numpy arrays; clump_size and algorithm
+are stored as codes into category lists kept in order of first
+appearance. Keys are unique, so results are always paired by key and
+never by position.
+
+usage:
+    store = ResultsStore()
+    store.add_json('data/validation_stats_lpa_star.json', 'lpa_star')
+    store.add_jsonl('data/validation_stats.jsonl', 'lpara_star')
+    ratios = store.ratio('lpara_star', 'lpa_star')
+    breakdown(ratios, 'size')
+"""
+import json
+
+import numpy as np
+
+import results
+
+CONFIG = ("connected", "size", "clump_size", "coverage", "percent_change")
+KEY = CONFIG + ("algorithm", "seed")
+CATEGORICAL = ("clump_size", "algorithm")
+DTYPES = {"connected": np.int8,
+          "size": np.int32,
+          "clump_size": np.int8,                                            # code into categories["clump_size"]
+          "coverage": np.float64,
+          "percent_change": np.float64,
+          "algorithm": np.int8,                                             # code into categories["algorithm"]
+          "seed": np.int64,                                                 # scenario seed, -1 = configuration average
+          "expanded": np.float64}                                           # states expanded, nan = failed round
+
+
+class ResultsStore:
+    def __init__(self):
+        self.columns = {name: np.empty(0, dtype) for name, dtype in DTYPES.items()}
+        self.categories = {name: [] for name in CATEGORICAL}
+
+    def __len__(self):
+        return len(self.columns["seed"])
+
+    def code(self, name, value):
+        """
+        :return: code of a categorical value, added to the categories if new
+        """
+
+        categories = self.categories[name]
+        if value not in categories:
+            categories.append(value)
+
+        return categories.index(value)
+
+    def add(self, records, algorithm, replace=False):
+        """
+        :param records: dicts with the configuration, "seed" and "expanded"
+        :param algorithm: name of the planner that produced them
+        :param replace: rows with a key already in the store replace it
+                        instead of raising ValueError
+        """
+
+        records = list(records)
+        new = {name: np.array([r[name] for r in records], dtype)
+               for name, dtype in DTYPES.items() if name not in CATEGORICAL}
+        new["clump_size"] = np.array([self.code("clump_size", r["clump_size"]) for r in records], np.int8)
+        new["algorithm"] = np.full(len(records), self.code("algorithm", algorithm), np.int8)
+
+        columns = {name: np.concatenate([self.columns[name], new[name]]) for name in DTYPES}
+        keys = composite(columns, KEY)
+        old, added = keys[:len(self)], keys[len(self):]
+
+        if len(np.unique(added)) != len(added):
+            raise ValueError("duplicate keys in the results added for " + algorithm)
+        clash = np.isin(old, added)
+        if clash.any():
+            if not replace:
+                raise ValueError("%d results for %s are already in the store" % (clash.sum(), algorithm))
+            columns = {name: column[np.concatenate([~clash, np.ones(len(added), bool)])]
+                       for name, column in columns.items()}
+
+        self.columns = columns
+
+    def add_json(self, file, algorithm, replace=False):
+        """
+        add the configuration averages of a summary file written by validate_all.
+        """
+
+        with open(file) as f:
+            stats = json.load(f)
+        self.add(({**r, "seed": -1, "expanded": nan(r["avg_states_expanded"])} for r in stats), algorithm, replace)
+
+    def add_jsonl(self, file, algorithm, replace=False):
+        """
+        add the rounds of a JSON-lines log written by validate_all. Only
+        rounds of configurations with a config record are read, so rounds
+        left by a crash are skipped; sweeps of the same configuration that
+        ran a scenario seed again (e.g. with another number of rounds)
+        keep the round logged last.
+        """
+
+        pending, rounds = {}, {}
+        with open(file) as f:
+            for line in f:
+                r = json.loads(line)
+                if r["record"] == "round":
+                    pending.setdefault(results.key(r), []).append(r)
+                elif r["record"] == "config":
+                    for done in pending.pop(results.key(r), []):
+                        rounds[tuple(done[name] for name in CONFIG) + (done["scenario_seed"],)] = \
+                            {**done, "seed": done["scenario_seed"], "expanded": nan(done.get("num_expanded"))}
+        self.add(rounds.values(), algorithm, replace)
+
+    def select(self, algorithm=None, **conditions):
+        """
+        :param conditions: column values, e.g. connected=8
+        :return: columns of the matching rows, categorical columns decoded
+        """
+
+        mask = np.ones(len(self), bool)
+        if algorithm is not None:
+            mask &= self.columns["algorithm"] == self.categories["algorithm"].index(algorithm)
+        for name, value in conditions.items():
+            if name in CATEGORICAL:
+                value = self.categories[name].index(value)
+            mask &= self.columns[name] == value
+
+        return self.decode({name: column[mask] for name, column in self.columns.items()})
+
+    def decode(self, columns):
+        """
+        :return: columns with the categorical codes replaced by their values
+        """
+
+        columns = dict(columns)
+        for name in CATEGORICAL:
+            if name in columns:
+                columns[name] = np.array(self.categories[name])[columns[name]]
+
+        return columns
+
+    def mean_by(self, names):
+        """
+        average the expansions of the rounds that did not fail over every
+        group of equal values in the columns names.
+        :return: columns names (categorical ones as codes), "expanded" and
+                 "count", one row per group in order of first appearance
+        """
+
+        keys = composite(self.columns, names)
+        groups, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        expanded = self.columns["expanded"]
+        ok = ~np.isnan(expanded)
+        count = np.bincount(inverse, weights=ok, minlength=len(groups))
+        total = np.bincount(inverse, weights=np.where(ok, expanded, 0.0), minlength=len(groups))
+
+        order = np.argsort(first)
+        table = {name: self.columns[name][first[order]] for name in names}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table["expanded"] = (total / count)[order]
+        table["count"] = count[order].astype(np.int64)
+
+        return table
+
+    def ratio(self, numerator, denominator, by=CONFIG):
+        """
+        :param numerator, denominator: algorithm names
+        :param by: columns results are averaged over and paired by;
+                   CONFIG + ("seed",) pairs the rounds of equal scenarios
+        :return: columns by (categorical ones decoded) and "ratio" of the
+                 numerator's to the denominator's average expansions
+        """
+
+        by = tuple(by)
+        table = self.mean_by(by + ("algorithm",))
+        sides = []
+        for name in (numerator, denominator):
+            if name not in self.categories["algorithm"]:
+                raise ValueError("no results for " + name)
+            mask = table["algorithm"] == self.categories["algorithm"].index(name)
+            sides.append({column: values[mask] for column, values in table.items()})
+
+        num, den = sides
+        keys = composite({name: np.concatenate([num[name], den[name]]) for name in by}, by)
+        num_keys, den_keys = keys[:len(num["expanded"])], keys[len(num["expanded"]):]
+        if not np.array_equal(np.sort(num_keys), np.sort(den_keys)):
+            missing = len(np.setxor1d(num_keys, den_keys))
+            raise ValueError("%d groups have results for only one of %s and %s" % (missing, numerator, denominator))
+
+        den_order = np.argsort(den_keys)
+        pair = den_order[np.searchsorted(den_keys, num_keys, sorter=den_order)]
+        result = {name: num[name] for name in by}
+        result["ratio"] = num["expanded"] / den["expanded"][pair]
+
+        return self.decode(result)
+
+    def save(self, file):
+        """
+        write the store as a compressed .npz of its columns and categories.
+        """
+
+        categories = {name + "_categories": np.array(values) for name, values in self.categories.items()}
+        np.savez_compressed(file, **self.columns, **categories)
+
+    @classmethod
+    def load(cls, file):
+        store = cls()
+        with np.load(file) as data:
+            store.columns = {name: data[name] for name in DTYPES}
+            store.categories = {name: data[name + "_categories"].tolist() for name in CATEGORICAL}
+
+        return store
+
+
+def nan(value):
+    return np.nan if value is None else value
+
+
+def composite(columns, names):
+    """
+    :return: one int64 key per row combining the values of the columns names
+    """
+
+    key = np.zeros(len(columns[names[0]]), np.int64)
+    width = 1
+    for name in names:
+        values, codes = np.unique(columns[name], return_inverse=True)
+        width *= len(values)
+        if width >= 2 ** 62:
+            raise OverflowError("too many distinct keys")
+        key = key * len(values) + codes
+
+    return key
+
+
+def breakdown(table, name, value="ratio"):
+    """
+    :return: mean of value for every distinct value of the column name, in order of first appearance
+    """
+
+    groups, first, inverse = np.unique(table[name], return_index=True, return_inverse=True)
+    means = np.bincount(inverse, weights=table[value]) / np.bincount(inverse)
+    order = np.argsort(first)
+
+    return {groups[i].item(): means[i].item() for i in order}
+
+
+def records(table):
+    """
+    :return: the rows of a table as dicts of python values, e.g. for json.dump
+    """
+
+    names = list(table)
+
+    return [dict(zip(names, (v.item() for v in row))) for row in zip(*(table[n] for n in names))]
@@ -0,0 +1,142 @@
+import os
+import random
+import struct
+import tempfile
+import zlib
+from array import array
+
+MAGIC = b"LPS2"
+STATE_SIZE = 625                                                        # words in a Mersenne Twister state
+
+
+class Scenario:
+    """
+    A reproducible validation world: the initial occupancy grid and, for
+    every round, the obstacle clumps removed and added by change_all_obs.
+    Maps and changes come from two random streams seeded by seed, so
+    planners run on the same scenario see the same worlds. Rounds that
+    were not recorded yet are drawn on demand and recorded, together with
+    the state of the change stream after them, so that a run needing more
+    rounds than were cached continues the stream instead of restarting it.
+    """
+
+    def __init__(self, size, coverage, clump_size, percent_change, seed):
+        self.key = (size, coverage, clump_size, percent_change, seed)
+        self.size = size
+        self.obs = None                                                     # occupancy bytes, None = not generated yet
+        self.changes = []                                                   # per round: (removed obs_list indices, added cell ids)
+        self.map_rng = random.Random("map:%d" % seed)
+        self.change_rng = random.Random("changes:%d" % seed)
+        self.change_state = self.change_rng.getstate()                      # change_rng after the recorded rounds
+        self.dirty = False
+
+    def file_name(self):
+        return "%s-%s-%s-%s-%s.bin" % self.key
+
+    def record_obs(self, cells):
+        self.obs = bytes(cells)
+        self.dirty = True
+
+    def record_changes(self, removed, added):
+        """
+        :param removed: indices into obs_list of the clumps removed
+        :param added: (x, y) centres of the clumps added
+        """
+
+        self.changes.append((sorted(removed), [y * self.size + x for x, y in added]))
+        self.change_state = self.change_rng.getstate()
+        self.dirty = True
+
+    def replay_changes(self, k):
+        """
+        :param k: round
+        :return: removed obs_list indices and added (x, y) centres of round k
+        """
+
+        removed, added = self.changes[k]
+
+        return set(removed), [(s % self.size, s // self.size) for s in added]
+
+    def dumps(self):
+        """
+        :return: the scenario in its binary format: a header, then the
+                 zlib-compressed occupancy, change stream state and
+                 per-round index arrays
+        """
+
+        version, internal, gauss_next = self.change_state
+        body = [struct.pack("<II", len(self.obs), len(self.changes)), self.obs,
+                array("I", internal).tobytes()]
+
+        for removed, added in self.changes:
+            body.append(struct.pack("<II", len(removed), len(added)))
+            body.append(array("I", removed).tobytes())
+            body.append(array("I", added).tobytes())
+
+        return MAGIC + zlib.compress(b"".join(body))
+
+    def loads(self, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a scenario file")
+
+        data = zlib.decompress(data[4:])
+        n, rounds = struct.unpack_from("<II", data)
+        i = 8 + n
+        self.obs = data[8:i]
+        internal = array("I")
+        internal.frombytes(data[i:i + 4 * STATE_SIZE])
+        i += 4 * STATE_SIZE
+        self.change_state = (self.change_rng.VERSION, tuple(internal), None)
+        self.change_rng.setstate(self.change_state)
+        self.changes = []
+
+        for k in range(rounds):
+            n_removed, n_added = struct.unpack_from("<II", data, i)
+            i += 8
+            removed, added = array("I"), array("I")
+            removed.frombytes(data[i:i + 4 * n_removed])
+            i += 4 * n_removed
+            added.frombytes(data[i:i + 4 * n_added])
+            i += 4 * n_added
+            self.changes.append((removed.tolist(), added.tolist()))
+
+        self.dirty = False
+
+    def save(self, cache_dir):
+        """
+        write the scenario to cache_dir if anything was recorded since it was loaded.
+        """
+
+        if not self.dirty:
+            return
+
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, self.file_name())
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", prefix=self.file_name(), dir=cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.dumps())
+            os.replace(tmp, path)                                           # workers saving the same key each write their own file
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.dirty = False
+
+
+def load(size, coverage, clump_size, percent_change, seed, cache_dir=None):
+    """
+    :param cache_dir: scenario cache directory, None = no cache
+    :return: the cached scenario for this key, or a new one to be recorded
+    """
+
+    scenario = Scenario(size, coverage, clump_size, percent_change, seed)
+
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, scenario.file_name())
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:4] == MAGIC:                                           # older formats are drawn again and overwritten
+                scenario.loads(data)
+
+    return scenario
@@ -0,0 +1,82 @@
+"""
+Heuristic weight (e) schedules for the anytime planners.
+
+After every ImprovePath the planner asks its schedule for the next e,
+passing the time and number of expansions that ImprovePath took and the
+time left before its deadline (None without a deadline). Every schedule
+stops at e = 1. A planner calls reset() when it starts a new search, so
+one schedule can be shared by several planners or sweep rounds.
+"""
+
+
+class FixedStep:
+    """
+    e -= step, the original ARA* / LPARA* decrement.
+    """
+
+    def __init__(self, step=0.1):
+        self.step = step
+
+    def reset(self):
+        pass
+
+    def next(self, e, elapsed, expanded, remaining=None):
+        return max(1.0, e - self.step)
+
+
+class GeometricStep:
+    """
+    shrink the distance to e = 1 by a constant factor: large steps while
+    the bound is loose, small ones close to optimal.
+    """
+
+    def __init__(self, factor=0.5, min_step=0.01):
+        self.factor = factor
+        self.min_step = min_step
+
+    def reset(self):
+        pass
+
+    def next(self, e, elapsed, expanded, remaining=None):
+        step = max((e - 1) * (1 - self.factor), self.min_step)
+
+        return max(1.0, e - step)
+
+
+class AdaptiveStep:
+    """
+    size the next step from the measured cost of the last ImprovePath.
+
+    With a deadline, the remaining time is split into as many rounds as
+    the last one fits (at most max_rounds), and the step is chosen to
+    reach e = 1 in that many. Without one, the step grows while rounds
+    expand fewer states than the first one did and shrinks when they
+    expand more, so cheap rounds are merged and expensive ones split.
+    """
+
+    def __init__(self, step=0.2, min_step=0.05, max_rounds=4):
+        self.initial_step = step
+        self.min_step = min_step
+        self.max_rounds = max_rounds
+        self.reset()
+
+    def reset(self):
+        """
+        forget the step and target learned in the last search.
+        """
+
+        self.step = self.initial_step
+        self.target = None                                                  # expansions of the first round
+
+    def next(self, e, elapsed, expanded, remaining=None):
+        if remaining is not None and elapsed > 0:
+            rounds = min(self.max_rounds, max(1, int(remaining / elapsed)))
+            step = (e - 1) / rounds
+        else:
+            expanded = max(expanded, 1)
+            if self.target is None:
+                self.target = expanded
+            ratio = min(2.0, max(0.5, self.target / expanded))
+            step = self.step = self.step * ratio
+
+        return max(1.0, e - max(step, self.min_step))
@@ -0,0 +1,29 @@
+import math
+
+from ara_star import AraStar
+
+SIZE = 20
+
+
+def grid(*blocked):
+    cells = bytearray(SIZE * SIZE)
+    for x, y in blocked:
+        cells[y * SIZE + x] = 1
+    return bytes(cells)
+
+
+def test_unreachable_goal_gives_empty_paths():
+    wall = grid(*[(10, y) for y in range(SIZE)])
+
+    for jps in (False, True):
+        paths, visited = AraStar((2, 2), (17, 17), 2.5, "euclidean", size=SIZE, obs=wall, jps=jps).searching()
+
+        assert paths and all(path == [] for path in paths)
+
+
+def test_reachable_goal_gives_path_from_start():
+    planner = AraStar((2, 2), (17, 17), 2.5, "euclidean", size=SIZE, obs=grid())
+    paths, visited = planner.searching()
+
+    assert paths[-1][0] == (17, 17) and paths[-1][-1] == (2, 2)
+    assert math.isclose(planner.g[planner.goal], 15 * math.sqrt(2))
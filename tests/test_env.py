@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from env import StateSpace
+
+MOTIONS_4 = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+MOTIONS_8 = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+
+
+@pytest.mark.parametrize("motions", [MOTIONS_4, MOTIONS_8])
+@pytest.mark.parametrize("x_range, y_range", [(7, 5), (3, 3), (5, 9)])
+def test_successors_match_the_motions_inside_the_grid(motions, x_range, y_range):
+    space = StateSpace(x_range, y_range, motions, sparse=False)
+
+    for s in range(space.size):
+        x, y = space.coords(s)
+        expected = [(dx, dy) for dx, dy in motions if 0 <= x + dx < x_range and 0 <= y + dy < y_range]
+        edges = space.successors(s)
+
+        assert [space.coords(s + offset) for offset, cost, a, b in edges] == \
+            [(x + dx, y + dy) for dx, dy in expected]
+        for (offset, cost, corner_a, corner_b), (dx, dy) in zip(edges, expected):
+            assert cost == math.hypot(dx, dy)
+            if dx and dy:
+                assert {space.coords(s + corner_a), space.coords(s + corner_b)} == {(x + dx, y), (x, y + dy)}
+            else:
+                assert corner_a == corner_b == 0
+
+
+def test_nine_border_classes():
+    space = StateSpace(6, 4, MOTIONS_8, sparse=False)
+    classes = [[space.edge_class[space.index((x, y))] for x in range(6)] for y in range(4)]
+
+    assert len(space.edge_table) == 9
+    assert classes[0] == [0, 1, 1, 1, 1, 2]
+    assert classes[1] == classes[2] == [3, 4, 4, 4, 4, 5]
+    assert classes[3] == [6, 7, 7, 7, 7, 8]
+    assert [len(space.edge_table[k]) for k in range(9)] == [3, 5, 3, 5, 8, 5, 3, 5, 3]
+
+
+def test_neighbors_and_distance():
+    space = StateSpace(5, 5, MOTIONS_8, sparse=False)
+    s = space.index((0, 0))
+
+    assert sorted(space.coords(n) for n in space.neighbors(s)) == [(0, 1), (1, 0), (1, 1)]
+    assert space.distance(s, space.index((3, 4))) == 5.0
+
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+import history
+
+
+def test_varint_round_trip():
+    for n in [0, 1, 0x7f, 0x80, 0x3fff, 0x4000, 2 ** 31, 2 ** 63 + 5]:
+        out = bytearray(b"x")
+        history.varint(n, out)
+
+        assert history.read_varint(bytes(out), 1) == (n, len(out))
+        assert len(out) - 1 == max(1, -(-n.bit_length() // 7))
+
+
+def test_zigzag_round_trip_through_a_stream(tmp_path):
+    rng = random.Random(0)
+    iterations = [[], [0], [5, 4, 6, 3, 7], [2 ** 40, 0, 2 ** 40 - 1],
+                  [rng.randrange(4000000) for _ in range(500)]]
+    path = str(tmp_path / "visited.bin")
+
+    stream = history.StreamHistory(path)
+    for visited_each in iterations:
+        stream.append(visited_each)
+    stream.close()
+
+    assert list(history.read(path)) == iterations
+    assert stream.counts() == [len(v) for v in iterations]
+    assert list(stream) == [[]] * len(iterations)
+
+
+def test_neighbouring_states_take_one_byte_each():
+    assert len(history.encode([100, 101, 100, 99, 98])) == 1 + 2 + 4      # length, first delta, four +-1 deltas
+
+
+def test_read_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"LPS2")
+
+    with pytest.raises(ValueError):
+        list(history.read(str(path)))
+
+
+def test_ring_keeps_the_last_iterations_aligned():
+    ring = history.RingHistory(2)
+    for k in range(4):
+        ring.append([k] * (k + 1))
+
+    assert list(ring) == [[], [], [2, 2, 2], [3, 3, 3, 3]]
+    assert ring.counts() == [1, 2, 3, 4] and len(ring) == 4
+    assert ring.get(0) == [] and ring.get(3) == [3, 3, 3, 3] and ring.get(-2) == [2, 2, 2]
+
+
+def test_policy():
+    assert isinstance(history.policy("full"), history.FullHistory)
+    assert type(history.policy("counts")) is history.CountHistory
+    assert history.policy("ring:3").kept.maxlen == 3
+    with pytest.raises(ValueError):
+        history.policy("stream")
+    with pytest.raises(ValueError):
+        history.policy("all")
@@ -0,0 +1,60 @@
+import random
+
+from hpa_star import HpaStar
+
+
+def assert_valid(planner, path):
+    """
+    path runs from goal to start over free cells, by single moves that
+    do not cut the corner of an obstacle.
+    """
+
+    assert path[0] == planner.s_goal and path[-1] == planner.s_start
+    assert not any(p in planner.obs for p in path)
+
+    for (x, y), (x_n, y_n) in zip(path, path[1:]):
+        dx, dy = x_n - x, y_n - y
+        assert (dx, dy) in planner.Env.motions
+        if dx and dy:
+            assert (x + dx, y) not in planner.obs and (x, y + dy) not in planner.obs
+
+
+def test_refined_paths_are_valid():
+    for connected in (4, 8):
+        for seed in range(5):
+            planner = HpaStar((5, 5), (55, 55), connected, 60, 0.15, 'small', 10,
+                              rng=random.Random(seed), plot=False)
+            path = planner.searching()
+            if path:
+                assert_valid(planner, path)
+
+
+def test_paths_stay_valid_after_update():
+    rng = random.Random(7)
+    planner = HpaStar((5, 5), (55, 55), 8, 60, 0.1, 'medium', 10, rng=random.Random(3), plot=False)
+    planner.searching()
+
+    for _ in range(30):
+        x, y = rng.randrange(60), rng.randrange(60)
+        if abs(x - 5) <= 1 and abs(y - 5) <= 1 or abs(x - 55) <= 1 and abs(y - 55) <= 1:
+            continue
+        planner.change_obs(x, y)
+        planner.replan()
+        if planner.path:
+            assert_valid(planner, planner.path)
+
+
+def test_queries_do_not_build_the_graph():
+    planner = HpaStar((5, 5), (55, 55), 8, 60, 0.1, 'small', 10, rng=random.Random(1), plot=False)
+    graph = planner.graph
+    built = {c: dict(edges) for c, edges in graph.intra.items()}
+
+    assert len(built) == graph.nx * graph.ny
+    planner.searching()
+    assert {c: dict(edges) for c, edges in graph.intra.items()} == built
+
+    planner.change_obs(25, 25)                                              # a clump across four clusters
+    assert set(graph.intra) == set(built)
+    built = {c: dict(edges) for c, edges in graph.intra.items()}
+    planner.replan()
+    assert {c: dict(edges) for c, edges in graph.intra.items()} == built
@@ -0,0 +1,53 @@
+import math
+import random
+
+import pytest
+
+from env import Env
+from jps import JumpPoints
+from ara_star import AraStar
+
+
+def test_needs_an_8_connected_grid():
+    env = Env((2, 2), (8, 8), connected=4, size=10, obs=bytes(100))
+
+    with pytest.raises(ValueError):
+        JumpPoints(env.space, env.obs.cells, env.space.index((8, 8)))
+
+
+def test_jumps_follow_free_lines():
+    env = Env((2, 2), (27, 27), size=30, coverage=0.2, rng=random.Random(5))
+    space, cells = env.space, env.obs.cells
+    jump = JumpPoints(space, cells, space.index((27, 27)))
+
+    for s in range(space.size):
+        if cells[s]:
+            continue
+        for parent in [s] + space.neighbors(s):
+            for offset, cost, corner_a, corner_b in jump.successors(s, parent):
+                (x, y), (x_n, y_n) = space.coords(s), space.coords(s + offset)
+                dx, dy = (x_n > x) - (x_n < x), (y_n > y) - (y_n < y)
+                assert x_n == x or y_n == y or abs(x_n - x) == abs(y_n - y)     # straight or diagonal
+                assert cost == math.hypot(x_n - x, y_n - y)
+                while (x, y) != (x_n, y_n):
+                    assert (x + dx, y) not in env.obs and (x, y + dy) not in env.obs
+                    x, y = x + dx, y + dy
+                    assert (x, y) not in env.obs
+
+
+def test_expand_fills_in_the_cells_between_jump_points():
+    assert JumpPoints.expand([]) == []
+    assert JumpPoints.expand([(0, 0), (2, 2), (2, 4)]) == [(0, 0), (1, 1), (2, 2), (2, 3), (2, 4)]
+
+
+def test_same_cost_as_the_full_search():
+    for seed in range(5):
+        planners = [AraStar((2, 2), (37, 37), 2.5, "euclidean", size=40, coverage=0.2,
+                            rng=random.Random(seed), jps=jps) for jps in (False, True)]
+        paths = [planner.searching()[0][-1] for planner in planners]
+
+        assert math.isclose(planners[0].g[planners[0].goal], planners[1].g[planners[1].goal])
+        for path in paths[1:]:
+            for (x, y), (x_n, y_n) in zip(path, path[1:]):
+                assert max(abs(x_n - x), abs(y_n - y)) == 1
+                assert (x_n, y_n) not in planners[1].obs
@@ -0,0 +1,63 @@
+import heapq
+import math
+import random
+
+from lpa_star import LPAStar
+
+SIZE = 30
+
+
+def dijkstra(p):
+    """
+    :return: cost of the shortest path from start to goal, inf if there is none
+    """
+
+    cells, dist, heap = p.cells, {p.start: 0.0}, [(0.0, p.start)]
+
+    while heap:
+        d, s = heapq.heappop(heap)
+        if s == p.goal:
+            return d
+        if d > dist[s]:
+            continue
+        for offset, c, corner_a, corner_b in p.space.successors(s):
+            s_n = s + offset
+            if cells[s_n] or cells[s + corner_a] or cells[s + corner_b]:
+                continue
+            if d + c < dist.get(s_n, math.inf):
+                dist[s_n] = d + c
+                heapq.heappush(heap, (d + c, s_n))
+
+    return math.inf
+
+
+def toggle(p, x, y):
+    """
+    block or free cell (x, y) the way on_press does.
+    """
+
+    s = p.space.index((x, y))
+    if (x, y) not in p.obs:
+        p.obs.add((x, y))
+    else:
+        p.obs.remove((x, y))
+        p.UpdateVertex(s)
+
+    for s_n in p.get_neighbor(s):
+        p.UpdateVertex(s_n)
+
+    p.ComputeShortestPath()
+
+
+def test_equal_cost_ties_terminate_with_the_shortest_path():
+    rng = random.Random(3)
+    p = LPAStar((2, 2), (27, 27), "euclidean", 8, SIZE, plot=False, obs=bytes(SIZE * SIZE))
+    p.ComputeShortestPath()
+
+    for _ in range(300):
+        x, y = rng.randrange(1, SIZE - 1), rng.randrange(1, SIZE - 1)
+        if (x, y) in ((2, 2), (27, 27)):
+            continue
+        toggle(p, x, y)
+        assert math.isclose(p.g[p.goal], dijkstra(p)), (x, y)
+
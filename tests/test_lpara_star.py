@@ -0,0 +1,69 @@
+import math
+
+from lpara_star_realtime import LparaStar
+
+SIZE = 20
+
+
+def planner(connected=8, e=2.5):
+    return LparaStar((2, 2), (17, 17), e, "euclidean", connected, SIZE, plot=False,
+                     obs=bytes(SIZE * SIZE))
+
+
+def change(p, cells, blocked):
+    """
+    block or free cells the way on_press does.
+    """
+
+    for c in cells:
+        if blocked:
+            p.obs.add(c)
+        else:
+            p.obs.remove(c)
+        p.s_changed.add(p.space.index(c))
+    p.new_env_changes = True
+
+
+def around(x, y, r):
+    return [(i, j) for i in range(x - r, x + r + 1) for j in range(y - r, y + r + 1)
+            if max(abs(i - x), abs(j - y)) == r]
+
+
+def test_plans_optimal_path_on_empty_grid():
+    p = planner()
+    p.searching()
+
+    assert p.update_e() == 1
+    assert math.isclose(p.g[p.goal], 15 * math.sqrt(2))
+    assert p.extract_path()[0] == (2, 2) and p.extract_path()[-1] == (17, 17)
+
+
+def test_goal_blocked_then_freed_is_reached_again():
+    for connected in (4, 8):
+        p = planner(connected)
+        p.searching()
+        cost = p.g[p.goal]
+
+        change(p, [(16, 16), (16, 17), (17, 16), (17, 17)], True)
+        p.searching()
+        assert p.g[p.goal] == math.inf
+        assert p.extract_path() == []
+
+        change(p, [(16, 16), (16, 17), (17, 16), (17, 17)], False)
+        p.searching()
+        assert p.g[p.goal] == cost
+        assert p.extract_path()[-1] == (17, 17)
+
+
+def test_cut_off_goal_terminates():
+    p = planner(4)
+    p.searching()
+
+    change(p, around(17, 17, 2), True)                                      # goal region still free, but enclosed
+    p.searching()
+    assert p.g[p.goal] == math.inf
+    assert p.extract_path() == []
+
+    change(p, [(15, 17)], False)                                            # reopen a gap on the way to the goal
+    p.searching()
+    assert p.g[p.goal] == 16 + 14
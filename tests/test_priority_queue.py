@@ -0,0 +1,150 @@
+import random
+
+import pytest
+
+from priority_queue import PriorityQueue, IndexedPriorityQueue
+
+
+def drain(queue):
+    order = []
+    while queue:
+        s, priority = queue.top()
+        queue.pop(s)
+        order.append((s, priority))
+    return order
+
+
+def test_pop_order_skips_stale_entries():
+    queue = PriorityQueue()
+    queue["a"], queue["b"], queue["c"] = 3, 1, 2
+    queue["b"] = 5                                                          # old entry of b goes stale
+    queue.pop("c")
+
+    assert drain(queue) == [("a", 3), ("b", 5)]
+    with pytest.raises(IndexError):
+        queue.top()
+
+
+def test_ties_broken_by_insertion_order():
+    queue = PriorityQueue()
+    for s in "dcab":
+        queue[s] = 1.0
+    queue["d"] = 1.0                                                        # re-setting keeps the insertion order
+
+    assert [s for s, priority in drain(queue)] == list("dcab")
+
+
+def test_matches_min_over_a_dict():
+    rng = random.Random(1)
+    queue, reference = PriorityQueue(), {}
+
+    for _ in range(2000):
+        s = rng.randrange(50)
+        if s in reference and rng.random() < 0.3:
+            assert queue.pop(s) == reference.pop(s)
+        else:
+            reference[s] = queue[s] = rng.randrange(10)
+        if reference:
+            s_min = min(reference, key=reference.get)
+            assert queue.top() == (s_min, reference[s_min])
+
+
+def test_large_update_takes_the_heapify_path():
+    queue = PriorityQueue({s: s for s in range(4)})
+    heap = queue.heap
+
+    queue.update({s: -s for s in range(2, 10)})                             # 8 * 4 >= len(heap)
+
+    assert queue.heap is not heap and len(queue.heap) == len(queue) == 10
+    assert drain(queue) == [(9, -9), (8, -8), (7, -7), (6, -6), (5, -5),
+                            (4, -4), (3, -3), (2, -2), (0, 0), (1, 1)]
+
+
+def test_small_update_pushes():
+    queue = PriorityQueue({s: s for s in range(20)})
+    heap = queue.heap
+
+    queue.update({3: -1})
+
+    assert queue.heap is heap
+    assert queue.top() == (3, -1)
+
+
+def test_reprioritise_merges_incons():
+    g, h = [0.0, 1.0, 2.0, 3.0], [4.0, 2.0, 1.0, 0.0]
+    queue = PriorityQueue({0: 0.0, 1: 0.0})
+
+    queue.reprioritise(g, h, 2.0, incons={3: 0.0})
+
+    assert sorted(queue.entries) == [0, 1, 3]
+    assert drain(queue) == [(3, 3.0), (1, 5.0), (0, 8.0)]
+
+
+def test_reprioritise_with_rhs_orders_under_consistent_first():
+    g, rhs, h = [1.0, 3.0, 2.0], [2.0, 1.0, 2.0], [2.0, 1.0, 1.0]
+    queue = PriorityQueue({0: 0.0, 1: 0.0, 2: 0.0})
+
+    queue.reprioritise(g, h, 2.0, rhs=rhs)
+
+    # under-consistent 0 is keyed on g + h, 1 on rhs + e * h, 2 on g + e * h
+    assert drain(queue) == [(0, (3.0, 0)), (1, (3.0, 1)), (2, (4.0, 1))]
+
+
+def test_compact_drops_stale_entries():
+    queue = PriorityQueue()
+    for k in range(200):
+        queue[k % 10] = k
+
+    assert len(queue.heap) <= 2 * len(queue) + 64
+    queue.compact()
+    assert len(queue.heap) == len(queue) == 10
+    assert queue.top() == (0, 190)
+
+
+def test_indexed_ties_broken_by_last_update():
+    queue = IndexedPriorityQueue()
+    for s in "abc":
+        queue[s] = (1, 0)
+    queue["a"] = (1, 0)
+
+    assert [s for s, key in drain(queue)] == ["b", "c", "a"]
+
+
+def test_indexed_remove_from_the_middle():
+    queue = IndexedPriorityQueue()
+    for s in range(10):
+        queue[s] = (s, 0)
+
+    assert queue.pop(4) == (4, 0)
+    assert queue.pop(4, None) is None
+    with pytest.raises(KeyError):
+        queue.pop(4)
+
+    assert all(queue.pos[entry[2]] == i for i, entry in enumerate(queue.heap))
+    assert [s for s, key in drain(queue)] == [0, 1, 2, 3, 5, 6, 7, 8, 9]
+
+
+def test_indexed_pop_of_the_last_element():
+    queue = IndexedPriorityQueue()
+    queue[1], queue[2] = (1, 0), (2, 0)
+
+    assert queue.pop(2) == (2, 0)                                           # last slot of the heap
+    assert queue.pop(1) == (1, 0)
+    assert len(queue) == 0 and not queue.pos
+    with pytest.raises(IndexError):
+        queue.top()
+
+
+def test_indexed_key_updates_keep_the_heap_valid():
+    rng = random.Random(2)
+    queue, reference = IndexedPriorityQueue(), {}
+
+    for _ in range(2000):
+        s = rng.randrange(40)
+        if s in reference and rng.random() < 0.3:
+            assert queue.pop(s) == reference.pop(s)
+        else:
+            reference[s] = queue[s] = (rng.randrange(10), rng.randrange(3))
+        assert all(queue.pos[entry[2]] == i for i, entry in enumerate(queue.heap))
+        if reference:
+            assert queue.top()[1] == min(reference.values())
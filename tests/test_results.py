@@ -0,0 +1,62 @@
+import json
+
+import results
+from results import JsonlSink
+
+CONFIG = (8, 30, 'small', 0.1, 0.2)
+
+
+def block(seed, expanded):
+    rounds = [{'record': 'round', 'round': i, 'num_expanded': n} for i, n in enumerate(expanded)]
+    return rounds + [results.summary(CONFIG, seed, len(rounds), rounds)]
+
+
+def lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_summary_skips_failed_rounds():
+    rounds = [{'num_expanded': 10}, {'error': 'ValueError: x'}, {'num_expanded': 20}]
+    record = results.summary(CONFIG, 3, 3, rounds)
+
+    assert record['successes'] == 2 and record['failures'] == 1
+    assert record['avg_states_expanded'] == 15
+    assert results.key(record) == CONFIG + (3, 3)
+    assert results.summary(CONFIG, 3, 1, [{'error': 'x'}])['avg_states_expanded'] is None
+
+
+def test_resume_reads_back_finished_configurations(tmp_path):
+    path = str(tmp_path / 'sub' / 'log.jsonl')
+    sink = JsonlSink(path)
+    sink.write(*block(0, [5, 7]))
+    sink.write(*block(1, [9]))
+    sink.close()
+
+    sink = JsonlSink(path)
+    assert set(sink.done) == {CONFIG + (0, 2), CONFIG + (1, 1)}
+    assert sink.done[CONFIG + (0, 2)]['avg_states_expanded'] == 6
+    sink.close()
+    assert len(lines(path)) == 5
+
+
+def test_incomplete_tail_is_truncated(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    sink = JsonlSink(path)
+    sink.write(*block(0, [5]))
+    sink.write({'record': 'config_error', 'seed': 1, 'error': 'x'})
+    sink.close()
+    with open(path, 'a') as f:
+        f.write(json.dumps({'record': 'round', 'round': 0, 'num_expanded': 1}) + '\n')  # block cut short by a crash
+        f.write('{"record": "ro')
+
+    sink = JsonlSink(path)
+    assert set(sink.done) == {CONFIG + (0, 1)}
+    sink.write(*block(2, [4]))
+    sink.close()
+
+    records = [r['record'] for r in lines(path)]
+    assert records == ['round', 'config', 'config_error', 'round', 'config']
+    sink = JsonlSink(path)
+    assert set(sink.done) == {CONFIG + (0, 1), CONFIG + (2, 1)}
+    sink.close()
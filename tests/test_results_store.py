@@ -0,0 +1,118 @@
+import json
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import results
+from results_store import ResultsStore, breakdown, records
+
+CONFIGS = [(4, 30, 'small', 0.1, 0.2), (8, 50, 'large', 0.1, 0.2)]
+
+
+def rows(expanded, seeds=(0, 1)):
+    """
+    :param expanded: per configuration, per seed
+    """
+
+    return [dict(zip(results.CONFIG, config), seed=seed, expanded=n)
+            for config, values in zip(CONFIGS, expanded) for seed, n in zip(seeds, values)]
+
+
+def test_add_rejects_duplicate_keys_unless_replacing():
+    store = ResultsStore()
+    store.add(rows([[10, 20], [30, 40]]), 'a')
+
+    with pytest.raises(ValueError):
+        store.add(rows([[1, 2], [3, 4]]), 'a')
+    with pytest.raises(ValueError):
+        store.add(rows([[1, 2], [3, 4]]) * 2, 'b')
+
+    store.add(rows([[11], [31]], seeds=(0,)), 'a', replace=True)
+    assert len(store) == 4
+    assert sorted(store.select('a', connected=4)['expanded'].tolist()) == [11, 20]
+
+
+def test_select_decodes_categories():
+    store = ResultsStore()
+    store.add(rows([[10, 20], [30, 40]]), 'a')
+    store.add(rows([[1, 2], [3, 4]]), 'b')
+
+    selected = store.select('b', clump_size='large')
+    assert selected['clump_size'].tolist() == ['large', 'large']
+    assert selected['algorithm'].tolist() == ['b', 'b']
+    assert selected['expanded'].tolist() == [3, 4]
+
+
+def test_ratio_pairs_by_key_and_skips_failed_rounds():
+    store = ResultsStore()
+    store.add(rows([[10, math.nan], [30, 50]]), 'a')
+    store.add(list(reversed(rows([[5, 5], [20, 20]]))), 'b')                # rows in another order
+
+    ratio = store.ratio('a', 'b')
+    assert records(ratio) == [dict(zip(results.CONFIG, CONFIGS[0]), ratio=2.0),
+                              dict(zip(results.CONFIG, CONFIGS[1]), ratio=2.0)]
+    assert breakdown(ratio, 'connected') == {4: 2.0, 8: 2.0}
+
+    per_seed = store.ratio('a', 'b', results.CONFIG + ('seed',))
+    assert np.isnan(per_seed['ratio']).sum() == 1
+
+    store.add(rows([[1]], seeds=(0,)), 'c')
+    with pytest.raises(ValueError):
+        store.ratio('a', 'c')
+    with pytest.raises(ValueError):
+        store.ratio('a', 'd')
+
+
+def test_mean_by_counts_only_successes():
+    store = ResultsStore()
+    store.add(rows([[10, math.nan], [30, 50]]), 'a')
+
+    table = store.mean_by(('connected',))
+    assert table['connected'].tolist() == [4, 8]
+    assert table['expanded'].tolist() == [10, 40]
+    assert table['count'].tolist() == [1, 2]
+
+
+def test_save_and_load(tmp_path):
+    store = ResultsStore()
+    store.add(rows([[10, 20], [30, 40]]), 'a')
+    store.save(str(tmp_path / 'store.npz'))
+
+    loaded = ResultsStore.load(str(tmp_path / 'store.npz'))
+    assert loaded.categories == store.categories
+    for name, column in store.columns.items():
+        assert column.dtype == loaded.columns[name].dtype
+        assert column.tolist() == loaded.columns[name].tolist()
+
+
+def test_add_jsonl_reads_finished_configurations(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    config = dict(zip(results.CONFIG, CONFIGS[0]))
+    lines = []
+    for num_rounds, expanded in ((2, [10, 20]), (1, [15])):                 # seed 0 ran again, keep the later round
+        rounds = [dict(config, record='round', round=i, scenario_seed=i, seed=0, num_rounds=num_rounds,
+                       num_expanded=n) for i, n in enumerate(expanded)]
+        lines += rounds + [results.summary(CONFIGS[0], 0, num_rounds, rounds)]
+    lines.append(dict(config, record='round', round=0, scenario_seed=5, seed=0, num_rounds=3, num_expanded=1))
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(r) + '\n' for r in lines)
+
+    store = ResultsStore()
+    store.add_jsonl(path, 'a')
+    selected = store.select('a')
+    assert sorted(zip(selected['seed'].tolist(), selected['expanded'].tolist())) == [(0, 15), (1, 20)]
+
+
+def test_add_json_reads_configuration_averages(tmp_path):
+    path = str(tmp_path / 'stats.json')
+    with open(path, 'w') as f:
+        json.dump([results.summary(CONFIGS[0], 0, 2, [{'num_expanded': 4}, {'num_expanded': 6}]),
+                   results.summary(CONFIGS[1], 0, 1, [{'error': 'x'}])], f)
+
+    store = ResultsStore()
+    store.add_json(path, 'a')
+    assert store.select('a')['seed'].tolist() == [-1, -1]
+    assert store.select('a', connected=4)['expanded'].tolist() == [5]
+    assert np.isnan(store.select('a', connected=8)['expanded']).all()
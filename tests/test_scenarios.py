@@ -0,0 +1,82 @@
+import os
+
+import scenarios
+import lpara_star_validation
+from lpara_star_validation import LparaStar
+
+KEY = (30, 0.1, 'small', 0.2, 7)                                            # size, coverage, clump size, percent change, seed
+
+
+def run(e, cache):
+    """
+    :return: the published paths and final occupancy of a planner on the scenario of KEY
+    """
+
+    size, coverage, clump_size, percent_change, seed = KEY
+    scenario = scenarios.load(*KEY, cache_dir=cache)
+    planner = LparaStar((5, 5), (size - 5, size - 5), e, "euclidean", 8, size, coverage, clump_size,
+                        percent_change, plot=False, scenario=scenario)
+    paths = planner.searching()[0]
+    if cache is not None:
+        scenario.save(cache)
+
+    return paths, bytes(planner.cells), len(scenario.changes)
+
+
+def test_dumps_and_loads_round_trip():
+    scenario = scenarios.Scenario(*KEY)
+    scenario.record_obs(bytes(range(256)) * 4)
+    scenario.change_rng.random()
+    scenario.record_changes({3, 1}, [(2, 4), (29, 0)])
+    scenario.record_changes(set(), [])
+
+    loaded = scenarios.Scenario(*KEY)
+    loaded.loads(scenario.dumps())
+
+    assert loaded.obs == scenario.obs
+    assert loaded.changes == [([1, 3], [122, 29]), ([], [])]
+    assert loaded.replay_changes(0) == ({1, 3}, [(2, 4), (29, 0)])
+    assert loaded.change_rng.random() == scenario.change_rng.random()
+    assert not loaded.dirty
+
+
+def test_save_only_when_recorded(tmp_path):
+    scenario = scenarios.load(*KEY, cache_dir=str(tmp_path))
+    scenario.save(str(tmp_path))
+    assert os.listdir(str(tmp_path)) == []
+
+    scenario.record_obs(bytes(900))
+    scenario.save(str(tmp_path))
+    assert os.listdir(str(tmp_path)) == [scenario.file_name()]
+    assert scenarios.load(*KEY, cache_dir=str(tmp_path)).obs == bytes(900)
+
+
+def test_older_formats_are_drawn_again(tmp_path):
+    scenario = scenarios.Scenario(*KEY)
+    with open(os.path.join(str(tmp_path), scenario.file_name()), "wb") as f:
+        f.write(b"LPS1" + bytes(16))
+
+    assert scenarios.load(*KEY, cache_dir=str(tmp_path)).obs is None
+
+
+def test_replay_matches_the_recorded_run(tmp_path):
+    recorded = run(1.4, str(tmp_path))
+    assert run(1.4, str(tmp_path)) == recorded
+    assert run(1.4, None) == recorded
+
+
+def test_longer_run_continues_the_cached_change_stream(tmp_path):
+    short = run(1.3, str(tmp_path))
+    longer = run(1.7, str(tmp_path))                                        # replays 3 rounds, draws the rest
+
+    assert short[2] < longer[2]
+    assert longer == run(1.7, None)
+    assert run(1.7, str(tmp_path)) == longer
+
+
+def test_run_rounds_is_reproducible(tmp_path):
+    first = lpara_star_validation.run_rounds(LparaStar, 1.5, 8, 30, 'small', 0.1, 0.2, 3, seed=11, cache=str(tmp_path))
+    again = lpara_star_validation.run_rounds(LparaStar, 1.5, 8, 30, 'small', 0.1, 0.2, 3, seed=11, cache=str(tmp_path))
+
+    assert [r['num_expanded'] for r in first] == [r['num_expanded'] for r in again]
+    assert len(os.listdir(str(tmp_path))) == 3
@@ -0,0 +1,30 @@
+import random
+
+from schedules import FixedStep, GeometricStep, AdaptiveStep
+from ara_star import AraStar
+
+
+def test_schedules_stop_at_one():
+    for schedule in (FixedStep(0.4), GeometricStep(), AdaptiveStep()):
+        e = 2.5
+        for expanded in range(1, 100):
+            e = schedule.next(e, 0.01, expanded)
+        assert e == 1.0
+
+
+def test_adaptive_step_reset_forgets_the_last_search():
+    schedule = AdaptiveStep(step=0.2)
+    schedule.next(3.0, 0.01, 100)
+    schedule.next(2.8, 0.01, 10)
+
+    assert schedule.step != 0.2 and schedule.target == 100
+    schedule.reset()
+    assert schedule.step == 0.2 and schedule.target is None
+
+
+def test_shared_schedule_gives_the_same_search():
+    schedule = AdaptiveStep()
+    runs = [AraStar((5, 5), (45, 45), 3.0, "euclidean", schedule, size=50, coverage=0.2, rng=random.Random(4)).searching()
+            for _ in range(2)]
+
+    assert runs[0] == runs[1]